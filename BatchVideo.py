@@ -0,0 +1,119 @@
+#!/usr/bin/env python
+"""
+Created on Oct 18, 2026
+
+@author: sgoldsmith
+
+Copyright (c) Steven P. Goldsmith
+
+All rights reserved.
+"""
+
+import ConfigParser, logging, sys, os, glob, json, traceback, datetime, multiprocessing, cv2, ProcessVideo, detect.Session
+
+def runJob(job):
+    """Process one video using one mode in worker process"""
+    configFileName, videoFileName, outputPath, modeName = job
+    # Jobs already use every core, so keep OpenCV from starting its own threads
+    cv2.setNumThreads(1)
+    try:
+        parser = ConfigParser.SafeConfigParser()
+        parser.read(configFileName)
+        # Workers run side by side, so each job gets its own mask and metrics file
+        jobName = "%s-%s" % (modeName, os.path.splitext(os.path.basename(videoFileName))[0])
+        maskFileName = os.path.join(outputPath, "%s-mask.png" % jobName)
+        metricsFileName = os.path.join(outputPath, "%s-%s" % (jobName, parser.get("profiling", "metricsFile")))
+        # Only one worker could bind the metrics port
+        reporterType = parser.get("profiling", "reporter")
+        if reporterType == "http":
+            reporterType = "none"
+        process = ProcessVideo.ProcessVideo(configFileName, videoFileName, outputPath, maskFileName, reporterType, metricsFileName)
+        useResize, useRoi, useCascade = detect.Session.Session.modes[modeName]
+        stats = process.run(useResize=useResize, useRoi=useRoi, useCascade=useCascade)
+        process.cleanUp()
+    except:
+        sys.stderr.write("%s " % datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S,%f"))
+        traceback.print_exc(file=sys.stderr)
+        stats = {"video": videoFileName, "mode": modeName, "error": traceback.format_exc()}
+    return stats
+
+class BatchVideo():
+    """Process many videos and modes across a process pool.
+    
+    One video and mode runs per worker and the pool is sized to the available cores.
+    When all jobs finish one report of frames, FPS, frames with people and elapsed
+    time per job is logged and written to report.json in the output path. Learned
+    masks and JSON metrics are written per job as <mode>-<video>-mask.png and
+    <mode>-<video>-<metricsFile>. Workers do not serve HTTP metrics.
+    
+    sys.argv[1] = Configuration file
+    sys.argv[2] = Comma separated video files and/or directories of .avi files
+    sys.argv[3] = Video output path
+    sys.argv[4] = Comma separated modes (optional, default noresize-noroi,resize-noroi,resize-roi)
+    
+    ./config/test.ini ./resources/ ./output/ resize-noroi,resize-roi
+    
+    """
+    
+    def __init__(self, configFileName, videos, outputPath, modeNames):
+        self.configFileName = configFileName
+        parser = ConfigParser.SafeConfigParser()
+        parser.read(configFileName)
+        self.logger = logging.getLogger("BatchVideo")
+        self.logger.setLevel(parser.get("logging", "level"))
+        if self.logger.handlers == []:
+            formatter = logging.Formatter(parser.get("logging", "formatter"))
+            handler = logging.StreamHandler(sys.stdout)
+            handler.setFormatter(formatter)
+            self.logger.addHandler(handler)
+        if parser.getboolean("video", "show"):
+            raise ValueError("Batch processing needs [video] show = False")
+        self.videoFileNames = []
+        for name in videos:
+            if os.path.isdir(name):
+                self.videoFileNames.extend(sorted(glob.glob(os.path.join(name, "*.avi"))))
+            else:
+                self.videoFileNames.append(name)
+        for modeName in modeNames:
+            if modeName not in detect.Session.Session.modes:
+                raise ValueError("Unknown mode %s, use one of %s" % (modeName, sorted(detect.Session.Session.modes.keys())))
+        self.outputPath = outputPath
+        self.modeNames = modeNames
+
+    def run(self):
+        """Run all jobs and write aggregated report"""
+        jobs = [(self.configFileName, videoFileName, self.outputPath, modeName)
+                for videoFileName in self.videoFileNames for modeName in self.modeNames]
+        workers = min(multiprocessing.cpu_count(), max(len(jobs), 1))
+        self.logger.info("Running %d jobs on %d processes" % (len(jobs), workers))
+        pool = multiprocessing.Pool(workers)
+        try:
+            # One job per task so long videos do not hold up queued ones
+            report = list(pool.imap_unordered(runJob, jobs, 1))
+        finally:
+            pool.close()
+            pool.join()
+        report.sort(key=lambda stats: (stats["video"], stats["mode"]))
+        for stats in report:
+            if "error" in stats:
+                self.logger.error("%s %s failed" % (os.path.basename(stats["video"]), stats["mode"]))
+            else:
+                self.logger.info("%-20s %-16s %6d frames, %6d frames with people, elapse time: %7.2f seconds, %6.1f FPS" %
+                                 (os.path.basename(stats["video"]), stats["mode"], stats["frames"], stats["imagesDetected"], stats["elapse"], stats["fps"]))
+        reportFileName = os.path.join(self.outputPath, "report.json")
+        self.logger.info("Writing report to file: %s" % reportFileName)
+        with open(reportFileName, "w") as reportFile:
+            json.dump(report, reportFile, indent=2, sort_keys=True)
+        return report
+
+if __name__ == "__main__":
+    try:
+        if len(sys.argv) > 4:
+            modeNames = sys.argv[4].split(",")
+        else:
+            modeNames = ["noresize-noroi", "resize-noroi", "resize-roi"]
+        batch = BatchVideo(sys.argv[1], sys.argv[2].split(","), sys.argv[3], modeNames)
+        batch.run()
+    except:
+        sys.stderr.write("%s " % datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S,%f"))
+        traceback.print_exc(file=sys.stderr)
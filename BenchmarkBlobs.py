@@ -0,0 +1,155 @@
+#!/usr/bin/env python
+"""
+Created on Oct 18, 2026
+
+@author: sgoldsmith
+
+Copyright (c) Steven P. Goldsmith
+
+All rights reserved.
+"""
+
+import ConfigParser, logging, sys, os, glob, traceback, time, datetime, numpy, cv2, detect.Motion, detect.MotionGray, detect.Rects
+
+class BenchmarkBlobs():
+    """Compare blob extractors against the original tree extractor and the gray motion
+    engine against the bgr engine.
+    
+    Each frame goes through motion detection once per engine. The same motion image is
+    then handed to every extractor, so only blob extraction is timed and compared.
+    
+    Engines are compared frame by frame. Frame agreement is the mean best IoU of every
+    rectangle of each engine against the other engine's rectangles (1 if neither has
+    any). A video whose mean frame agreement is below minEngineIou fails and the exit
+    status is 1.
+    
+    sys.argv[1] = Configuration file
+    sys.argv[2] = Video directory
+    
+    ./config/test.ini ./resources/
+    
+    """
+    
+    extractors = ["tree", "closing", "grid"]
+    
+    def __init__(self, configFileName):
+        """Read in motion configuration"""
+        self.parser = ConfigParser.SafeConfigParser()
+        self.parser.read(configFileName)
+        self.logger = logging.getLogger("BenchmarkBlobs")
+        self.logger.setLevel(self.parser.get("logging", "level"))
+        if self.logger.handlers == []:
+            formatter = logging.Formatter(self.parser.get("logging", "formatter"))
+            handler = logging.StreamHandler(sys.stdout)
+            handler.setFormatter(formatter)
+            self.logger.addHandler(handler)
+        self.logger.info("Configuring from file: %s" % configFileName)
+        self.resizeWidth = self.parser.getint("video", "resizeWidth")
+        self.resizeHeight = self.parser.getint("video", "resizeHeight")
+        self.kSize = eval(self.parser.get("motion", "kSize"), {}, {})
+        self.alpha = self.parser.getfloat("motion", "alpha")
+        self.blackThreshold = self.parser.getint("motion", "blackThreshold")
+        self.maxChange = self.parser.getfloat("motion", "maxChange")
+        self.dilateAmount = self.parser.getint("motion", "dilateAmount")
+        self.erodeAmount = self.parser.getint("motion", "erodeAmount")
+        self.gridSize = self.parser.getint("motion", "gridSize")
+        self.useGrayEngine = self.parser.getboolean("motion", "useGrayEngine")
+        self.minEngineIou = self.parser.getfloat("benchmark", "minEngineIou")
+
+    def createMotion(self, blobExtractor, imgWidth, imgHeight, useGrayEngine):
+        """Create motion detector using blob extractor"""
+        if useGrayEngine:
+            motionClass = detect.MotionGray.MotionGray
+        else:
+            motionClass = detect.Motion.Motion
+        return motionClass(self.resizeWidth, self.resizeHeight, imgWidth, imgHeight,
+                           self.kSize, self.alpha, self.blackThreshold, self.maxChange, self.dilateAmount, self.erodeAmount,
+                           False, (0, 255, 0), (255, 0, 0), 2, None, None, blobExtractor, self.gridSize)
+
+    def bestIous(self, rects, others):
+        """Best intersection over union of each of rects with any of others"""
+        if len(rects) == 0:
+            return numpy.zeros(0)
+        if len(others) == 0:
+            return numpy.zeros(len(rects))
+        return detect.Rects.iou(detect.Rects.toArray(rects), detect.Rects.toArray(others)).max(axis=1)
+
+    def frameIou(self, rects, others):
+        """Mean best IoU of both rectangle lists against each other, 1 if both are empty"""
+        ious = numpy.concatenate((self.bestIous(rects, others), self.bestIous(others, rects)))
+        if len(ious) == 0:
+            return 1.0
+        return ious.mean()
+
+    def run(self, fileName):
+        """Time and compare extractors and engines on one video, return True if engines agree"""
+        capture = cv2.VideoCapture(fileName)
+        s, target = capture.read()
+        imgHeight, imgWidth = target.shape[:2]
+        motions = dict([(name, self.createMotion(name, imgWidth, imgHeight, self.useGrayEngine)) for name in self.extractors])
+        # Tree extractor of each engine
+        engines = {"bgr": self.createMotion("tree", imgWidth, imgHeight, False),
+                   "gray": self.createMotion("tree", imgWidth, imgHeight, True)}
+        if self.useGrayEngine:
+            motions["tree"] = engines["gray"]
+        else:
+            motions["tree"] = engines["bgr"]
+        elapse = dict([(name, 0.0) for name in self.extractors])
+        rects = dict([(name, 0) for name in self.extractors])
+        ious = dict([(name, []) for name in self.extractors])
+        engineIous = []
+        frames = 0
+        while s:
+            source = cv2.resize(target, (self.resizeWidth, self.resizeHeight), interpolation=cv2.INTER_NEAREST)
+            bgrLocations = engines["bgr"].detect(source, target)
+            grayLocations = engines["gray"].detect(source, target)
+            engineIous.append(self.frameIou(bgrLocations, grayLocations))
+            if engineIous[-1] < self.minEngineIou:
+                self.logger.debug("%s frame %d engine IoU %4.3f, bgr %s, gray %s" % (os.path.basename(fileName), frames, engineIous[-1], bgrLocations, grayLocations))
+            # Tree detector of configured engine does the motion image for everyone
+            if self.useGrayEngine:
+                treeLocations = grayLocations
+            else:
+                treeLocations = bgrLocations
+            grayImg = motions["tree"].grayImg
+            for name in self.extractors:
+                start = time.time()
+                locations = motions[name].contours(grayImg.copy())
+                elapse[name] += time.time() - start
+                rects[name] += len(locations)
+                ious[name].extend(self.bestIous(treeLocations, locations))
+            frames += 1
+            s, target = capture.read()
+        for name in self.extractors:
+            if len(ious[name]) > 0:
+                meanIou = numpy.mean(ious[name])
+            else:
+                meanIou = 1.0
+            self.logger.info("%s %-8s %5d frames, %6d rects, mean best IoU vs tree %4.3f, %7.2f ms per frame" %
+                             (os.path.basename(fileName), name, frames, rects[name], meanIou, elapse[name] * 1000.0 / max(frames, 1)))
+        if len(engineIous) > 0:
+            meanIou = numpy.mean(engineIous)
+            minIou = numpy.min(engineIous)
+        else:
+            meanIou = 1.0
+            minIou = 1.0
+        below = sum(1 for iou in engineIous if iou < self.minEngineIou)
+        self.logger.info("%s gray vs bgr engine: mean frame IoU %4.3f, min %4.3f, %d of %d frames below %4.3f" %
+                         (os.path.basename(fileName), meanIou, minIou, below, frames, self.minEngineIou))
+        if meanIou < self.minEngineIou:
+            self.logger.warning("%s gray engine does not agree with bgr engine, mean frame IoU %4.3f < %4.3f" %
+                                (os.path.basename(fileName), meanIou, self.minEngineIou))
+            return False
+        return True
+        
+if __name__ == "__main__":
+    try:
+        benchmark = BenchmarkBlobs(sys.argv[1])
+        failed = [fileName for fileName in sorted(glob.glob(os.path.join(sys.argv[2], "*.avi"))) if not benchmark.run(fileName)]
+        if len(failed) > 0:
+            sys.exit(1)
+    except SystemExit:
+        raise
+    except:
+        sys.stderr.write("%s " % datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S,%f"))
+        traceback.print_exc(file=sys.stderr)
@@ -0,0 +1,215 @@
+#!/usr/bin/env python
+"""
+Created on Oct 18, 2026
+
+@author: sgoldsmith
+
+Copyright (c) Steven P. Goldsmith
+
+All rights reserved.
+"""
+
+import ConfigParser, logging, sys, os, glob, json, platform, resource, traceback, time, datetime, multiprocessing, numpy, cv2, detect.Session
+
+def runTrials(job):
+    """Warm up and time trials of one video, mode and motion engine in worker process"""
+    configFileName, videoFileName, modeName, engine, trials, warmupFrames, maxFrames = job
+    parser = ConfigParser.SafeConfigParser()
+    parser.read(configFileName)
+    config = detect.Session.Session.readConfig(parser)
+    config["useGrayEngine"] = engine == "gray"
+    session = detect.Session.Session(config)
+    useResize, useRoi, useCascade = detect.Session.Session.modes[modeName]
+    capture = cv2.VideoCapture(videoFileName)
+    fps = capture.get(cv2.CAP_PROP_FPS)
+    if fps <= 0.0:
+        fps = 30.0
+    imgWidth = int(capture.get(cv2.CAP_PROP_FRAME_WIDTH))
+    imgHeight = int(capture.get(cv2.CAP_PROP_FRAME_HEIGHT))
+    latencies = []
+    trialFps = []
+    trialP95 = []
+    # Warm up run builds detectors and workers and is not timed
+    for trial in xrange(trials + 1):
+        capture.set(cv2.CAP_PROP_POS_FRAMES, 0)
+        session.start(imgWidth, imgHeight, useResize, useRoi, useCascade, fps)
+        hogCalls = session.hogCalls()
+        if trial == 0:
+            limit = warmupFrames
+        else:
+            limit = maxFrames
+        frames = 0
+        imagesDetected = 0
+        peopleFound = 0
+        elapse = 0.0
+        frameTimes = []
+        s, target = capture.read()
+        while s and (limit <= 0 or frames < limit):
+            # Decoding is not timed
+            start = time.time()
+            result = session.process(target)
+            frameTime = time.time() - start
+            elapse += frameTime
+            frameTimes.append(frameTime)
+            if len(result.foundLocations) > 0:
+                imagesDetected += 1
+                peopleFound += len(result.foundLocations)
+            frames += 1
+            s, target = capture.read()
+        if trial > 0 and frames > 0:
+            latencies.extend(frameTimes)
+            trialFps.append(frames / max(elapse, 0.000001))
+            trialP95.append(float(numpy.percentile(frameTimes, 95)))
+    hogCalls = session.hogCalls() - hogCalls
+    session.close()
+    capture.release()
+    # Nothing to time if video has no frames or all were used by warm up
+    if len(latencies) == 0:
+        return {"video": os.path.basename(videoFileName), "mode": modeName, "engine": engine, "frames": 0,
+                "error": "No frames timed"}
+    if session.framePixels > 0:
+        roiFraction = float(session.hogPixels) / session.framePixels
+    else:
+        roiFraction = 0.0
+    p50, p95, p99 = numpy.percentile(latencies, [50, 95, 99])
+    # Peak resident set size of this worker process in KB
+    return {"video": os.path.basename(videoFileName), "mode": modeName, "engine": engine, "trials": len(trialFps), "frames": frames,
+            "timedFrames": len(latencies), "fps": float(numpy.median(trialFps)), "trialFps": trialFps, "trialP95": trialP95,
+            "p50": p50, "p95": p95, "p99": p99,
+            "peakRss": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss, "hogCalls": hogCalls,
+            "roiFraction": roiFraction, "imagesDetected": imagesDetected, "peopleFound": peopleFound}
+
+class BenchmarkModes():
+    """Benchmark detection modes and motion engines over a directory of videos.
+
+    Every video, mode and engine runs in its own fresh process so peak RSS is per job.
+    A warm up pass builds detectors, then trials are timed per frame (decode is not
+    timed). FPS is the median over trials and latency percentiles are over all timed
+    frames. The last trial's HOG calls, ROI pixel fraction (pixels scanned by HOG over
+    pixels of the frames they came from) and detection counts are kept. Results are
+    written to JSON. Jobs with no timed frames are logged and listed as skipped.
+
+    If a baseline JSON from an earlier run is passed, jobs are compared with it. The
+    allowed FPS drop and p95 growth is tolerance plus the run to run noise of the job,
+    the bigger spread ((max - min) / median) of per-trial values in either run. Jobs
+    beyond that are reported as regressions and the exit status is 1. Jobs with fewer
+    than minTrials trials or minFrames timed frames in either run are too noisy to judge
+    and are only logged.
+
+    sys.argv[1] = Configuration file
+    sys.argv[2] = Video directory
+    sys.argv[3] = Results JSON file
+    sys.argv[4] = Baseline JSON file (optional)
+
+    ./config/test.ini ./resources/ ./output/benchmark.json ./output/baseline.json
+
+    """
+
+    def __init__(self, configFileName):
+        self.configFileName = configFileName
+        parser = ConfigParser.SafeConfigParser()
+        parser.read(configFileName)
+        self.logger = logging.getLogger("BenchmarkModes")
+        self.logger.setLevel(parser.get("logging", "level"))
+        if self.logger.handlers == []:
+            formatter = logging.Formatter(parser.get("logging", "formatter"))
+            handler = logging.StreamHandler(sys.stdout)
+            handler.setFormatter(formatter)
+            self.logger.addHandler(handler)
+        self.logger.info("Configuring from file: %s" % configFileName)
+        self.trials = parser.getint("benchmark", "trials")
+        self.warmupFrames = parser.getint("benchmark", "warmupFrames")
+        self.maxFrames = parser.getint("benchmark", "maxFrames")
+        self.modeNames = [name.strip() for name in parser.get("benchmark", "modes").split(",")]
+        self.engines = [name.strip() for name in parser.get("benchmark", "engines").split(",")]
+        self.tolerance = parser.getfloat("benchmark", "tolerance")
+        self.minTrials = parser.getint("benchmark", "minTrials")
+        self.minFrames = parser.getint("benchmark", "minFrames")
+        for modeName in self.modeNames:
+            if modeName not in detect.Session.Session.modes:
+                raise ValueError("Unknown mode %s, use one of %s" % (modeName, sorted(detect.Session.Session.modes.keys())))
+        for engine in self.engines:
+            if engine not in ("bgr", "gray"):
+                raise ValueError("Unknown engine %s, use bgr or gray" % engine)
+
+    def run(self, videoPath, resultsFileName):
+        """Run every job one at a time and write results"""
+        jobs = [(self.configFileName, videoFileName, modeName, engine, self.trials, self.warmupFrames, self.maxFrames)
+                for videoFileName in sorted(glob.glob(os.path.join(videoPath, "*.avi")))
+                for modeName in self.modeNames for engine in self.engines]
+        self.logger.info("Running %d jobs, %d trials each" % (len(jobs), self.trials))
+        # One job at a time so jobs do not compete for cores, new process per job for RSS
+        pool = multiprocessing.Pool(1, maxtasksperchild=1)
+        results = []
+        skipped = []
+        try:
+            for stats in pool.imap(runTrials, jobs, 1):
+                if "error" in stats:
+                    self.logger.warning("%-18s %-15s %-4s skipped: %s" % (stats["video"], stats["mode"], stats["engine"], stats["error"]))
+                    skipped.append(stats)
+                    continue
+                self.logger.info("%-18s %-15s %-4s %5d frames, %6.1f FPS, p50 %6.1f ms, p95 %6.1f ms, p99 %6.1f ms, %7d KB, %5d HOG calls, ROI fraction %4.2f, %4d frames with people" %
+                                 (stats["video"], stats["mode"], stats["engine"], stats["frames"], stats["fps"], stats["p50"] * 1000.0,
+                                  stats["p95"] * 1000.0, stats["p99"] * 1000.0, stats["peakRss"], stats["hogCalls"], stats["roiFraction"], stats["imagesDetected"]))
+                results.append(stats)
+        finally:
+            pool.close()
+            pool.join()
+        report = {"created": datetime.datetime.now().isoformat(), "config": self.configFileName,
+                  "environment": {"python": platform.python_version(), "opencv": cv2.__version__, "numpy": numpy.__version__,
+                                  "platform": platform.platform(), "processor": platform.processor(), "cpus": multiprocessing.cpu_count()},
+                  "results": results, "skipped": skipped}
+        self.logger.info("Writing results to file: %s" % resultsFileName)
+        with open(resultsFileName, "w") as resultsFile:
+            json.dump(report, resultsFile, indent=2, sort_keys=True)
+        return report
+
+    def spread(self, values):
+        """Relative spread of per-trial values, (max - min) / median"""
+        if len(values) < 2:
+            return 0.0
+        return (max(values) - min(values)) / max(numpy.median(values), 0.000001)
+
+    def compare(self, report, baselineFileName):
+        """Log changes against baseline and return list of regressions"""
+        with open(baselineFileName) as baselineFile:
+            baseline = json.load(baselineFile)
+        baselineResults = dict([((stats["video"], stats["mode"], stats["engine"]), stats) for stats in baseline["results"]])
+        regressions = []
+        for stats in report["results"]:
+            key = (stats["video"], stats["mode"], stats["engine"])
+            if key not in baselineResults:
+                self.logger.info("%s %s %s not in baseline" % key)
+                continue
+            old = baselineResults[key]
+            fpsChange = stats["fps"] / old["fps"] - 1.0
+            p95Change = stats["p95"] / old["p95"] - 1.0
+            # Changes within run to run noise are not regressions
+            fpsAllowed = self.tolerance + max(self.spread(stats["trialFps"]), self.spread(old.get("trialFps", [])))
+            p95Allowed = self.tolerance + max(self.spread(stats["trialP95"]), self.spread(old.get("trialP95", [])))
+            self.logger.info("%-18s %-15s %-4s FPS %+6.1f%% (allowed -%4.1f%%), p95 %+6.1f%% (allowed +%4.1f%%)" %
+                             (key + (fpsChange * 100.0, fpsAllowed * 100.0, p95Change * 100.0, p95Allowed * 100.0)))
+            trials = min(len(stats["trialP95"]), len(old.get("trialP95", [])))
+            timedFrames = min(stats["timedFrames"], old.get("timedFrames", 0))
+            if trials < self.minTrials or timedFrames < self.minFrames:
+                self.logger.info("%s %s %s not judged, %d trials and %d timed frames, need %d and %d" %
+                                 (key + (trials, timedFrames, self.minTrials, self.minFrames)))
+            elif fpsChange < -fpsAllowed or p95Change > p95Allowed:
+                self.logger.warning("Regression: %s %s %s" % key)
+                regressions.append(key)
+            if stats["imagesDetected"] != old["imagesDetected"]:
+                self.logger.warning("%s %s %s frames with people changed from %d to %d" % (key + (old["imagesDetected"], stats["imagesDetected"])))
+        self.logger.info("%d regressions" % len(regressions))
+        return regressions
+
+if __name__ == "__main__":
+    try:
+        benchmark = BenchmarkModes(sys.argv[1])
+        report = benchmark.run(sys.argv[2], sys.argv[3])
+        if len(sys.argv) > 4 and len(benchmark.compare(report, sys.argv[4])) > 0:
+            sys.exit(1)
+    except SystemExit:
+        raise
+    except:
+        sys.stderr.write("%s " % datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S,%f"))
+        traceback.print_exc(file=sys.stderr)
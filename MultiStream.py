@@ -0,0 +1,93 @@
+#!/usr/bin/env python
+"""
+Created on Oct 18, 2026
+
+@author: sgoldsmith
+
+Copyright (c) Steven P. Goldsmith
+
+All rights reserved.
+"""
+
+import ConfigParser, logging, sys, os, json, time, traceback, datetime, detect.Session, pipeline.Stream, pipeline.Scheduler
+
+class MultiStream():
+    """Process many streams at once on a shared pool of detection workers.
+
+    Sources are video files, named pipes or directories of frame images. A source can
+    end with @priority to get a bigger share of the workers (default 1). With replay
+    files are read at their native FPS, so the bundled videos act as live cameras. When
+    every stream ends a report of frames read, analyzed and dropped, frames with people
+    and mean latency per stream is logged and written to multistream.json in the output
+    path.
+
+    sys.argv[1] = Configuration file
+    sys.argv[2] = Comma separated sources
+    sys.argv[3] = Report output path
+
+    ./config/test.ini ./resources/walking.avi@2,./resources/edger.avi,./resources/two-guys.avi ./output/
+
+    """
+
+    def __init__(self, configFileName, sources, outputPath):
+        parser = ConfigParser.SafeConfigParser()
+        parser.read(configFileName)
+        self.logger = logging.getLogger("ProcessVideo")
+        self.logger.setLevel(parser.get("logging", "level"))
+        if self.logger.handlers == []:
+            formatter = logging.Formatter(parser.get("logging", "formatter"))
+            handler = logging.StreamHandler(sys.stdout)
+            handler.setFormatter(formatter)
+            self.logger.addHandler(handler)
+        if parser.getboolean("video", "show"):
+            raise ValueError("Multi-stream processing needs [video] show = False")
+        self.workers = parser.getint("multiStream", "workers")
+        self.queueSize = parser.getint("multiStream", "queueSize")
+        self.replay = parser.getboolean("multiStream", "replay")
+        self.frameFps = parser.getfloat("multiStream", "frameFps")
+        modeName = parser.get("multiStream", "mode")
+        if modeName not in detect.Session.Session.modes:
+            raise ValueError("Unknown mode %s, use one of %s" % (modeName, sorted(detect.Session.Session.modes.keys())))
+        # Parse once and share typed values across stream sessions
+        config = detect.Session.Session.readConfig(parser)
+        # Scheduler workers already run streams in parallel
+        config["roiWorkers"] = 0
+        config["tileWorkers"] = 0
+        self.streams = []
+        for i, source in enumerate(sources):
+            priority = 1
+            if "@" in source:
+                source, priority = source.rsplit("@", 1)
+                priority = int(priority)
+            name = "%d-%s" % (i, os.path.basename(source.rstrip(os.sep)))
+            self.streams.append(pipeline.Stream.Stream(name, source, detect.Session.Session(config), detect.Session.Session.modes[modeName],
+                                                       self.queueSize, priority, self.replay, self.frameFps))
+        self.outputPath = outputPath
+
+    def run(self):
+        """Run all streams and write report"""
+        scheduler = pipeline.Scheduler.Scheduler(self.streams, self.workers)
+        start = time.time()
+        scheduler.run()
+        elapse = time.time() - start
+        report = []
+        for stream in self.streams:
+            stream.session.close()
+            stats = stream.stats()
+            report.append(stats)
+            self.logger.info("%-24s priority %d, %5d frames, %5d analyzed, %5d dropped, %5d frames with people, latency: %5.3f seconds" %
+                             (stream.name, stats["priority"], stats["frames"], stats["analyzed"], stats["dropped"], stats["imagesDetected"], stats["latency"]))
+        self.logger.info("%d streams, elapse time: %4.2f seconds" % (len(self.streams), elapse))
+        reportFileName = os.path.join(self.outputPath, "multistream.json")
+        self.logger.info("Writing report to file: %s" % reportFileName)
+        with open(reportFileName, "w") as reportFile:
+            json.dump(report, reportFile, indent=2, sort_keys=True)
+        return report
+
+if __name__ == "__main__":
+    try:
+        multiStream = MultiStream(sys.argv[1], sys.argv[2].split(","), sys.argv[3])
+        multiStream.run()
+    except:
+        sys.stderr.write("%s " % datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S,%f"))
+        traceback.print_exc(file=sys.stderr)
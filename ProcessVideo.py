@@ -9,7 +9,8 @@ Copyright (c) Steven P. Goldsmith
 All rights reserved.
 """
 
-import ConfigParser, logging, sys, os, traceback, time, datetime, numpy, cv2, detect.Motion, detect.People, cProfile, pstats
+import ConfigParser, logging, sys, os, traceback, threading, time, datetime, numpy, cv2, cProfile, pstats
+import detect.Session, detect.Metrics, detect.MaskLearner, pipeline.FrameQueue, pipeline.Stage, pipeline.Deadline, pipeline.ClipRecorder, pipeline.ResultSink, pipeline.Reporter
 
 class ProcessVideo():
     """Main class used to acquire and process frames for people detection using motion detection ROI.
@@ -35,8 +36,13 @@ class ProcessVideo():
     
     """    
     
-    def __init__(self, configFileName):
-        """Read in configuration, set up video writer and setup windows"""
+    def __init__(self, configFileName, videoFileName, outputPath, maskFileName, reporterType=None, metricsFileName=None):
+        """Read in configuration, set up video writer and setup windows.
+
+        reporterType and metricsFileName override [profiling] reporter and metricsFile
+        if not None, so processes running side by side do not share a file or port.
+
+        """
         self.parser = ConfigParser.SafeConfigParser()
         # Read configuration file
         self.parser.read(configFileName)
@@ -53,59 +59,68 @@ class ProcessVideo():
         self.logger.info("Logging level: %s" % self.parser.get("logging", "level"))
         self.logger.debug("Logging formatter: %s" % self.parser.get("logging", "formatter"))
         self.profile = self.parser.getboolean("profiling", "profile")
+        # Stage timers and counters are always kept and shared with detectors
+        self.metrics = detect.Metrics.getMetrics("ProcessVideo")
+        if reporterType == None:
+            reporterType = self.parser.get("profiling", "reporter")
+        if metricsFileName == None:
+            metricsFileName = "%s%s" % (outputPath, self.parser.get("profiling", "metricsFile"))
+        self.reporter = self.createReporter(reporterType, self.parser.getfloat("profiling", "reportInterval"),
+                                            metricsFileName, self.parser.getint("profiling", "metricsPort"))
         # Set video related data attributes
-        self.resizeWidth = self.parser.getint("video", "resizeWidth")
-        self.resizeHeight = self.parser.getint("video", "resizeHeight")
         self.showWindow = self.parser.getboolean("video", "show")
-        # Set motion related data attributes
-        self.kSize = eval(self.parser.get("motion", "kSize"), {}, {})
-        self.alpha = self.parser.getfloat("motion", "alpha")
-        self.blackThreshold = self.parser.getint("motion", "blackThreshold")
-        self.maxChange = self.parser.getfloat("motion", "maxChange")
-        self.startThreshold = self.parser.getfloat("motion", "startThreshold")
-        self.stopThreshold = self.parser.getfloat("motion", "stopThreshold")
-        self.dilateAmount = self.parser.getint("motion", "dilateAmount")
-        self.erodeAmount = self.parser.getint("motion", "erodeAmount")        
-        self.markObjects = self.parser.getboolean("motion", "markObjects")          
-        self.boxColor = eval(self.parser.get("motion", "boxColor"), {}, {})        
-        self.ignoreAreasBoxColor = eval(self.parser.get("motion", "ignoreAreasBoxColor"), {}, {})        
-        self.boxThickness = self.parser.getint("motion", "boxThickness")
-        if eval(self.parser.get("motion", "ignoreAreas")) == None:
-                self.ignoreAreas = None
-        else:
-            self.ignoreAreas = numpy.array(eval(self.parser.get("motion", "ignoreAreas"), {}, {}), dtype=numpy.int32)
-        self.ignoreMask = self.parser.get("motion", "ignoreMask")
-        if self.ignoreMask != "":
-            self.maskImg = cv2.imread(self.ignoreMask)
-            self.maskImg = cv2.cvtColor(self.maskImg, cv2.COLOR_BGR2GRAY)
-        else:
-            self.ignoreMask = None
-            self.maskImg = None
-        # Set people detect related data attributes
-        self.minWidth = self.parser.getint("peopleDetect", "minWidth")
-        self.minHeight = self.parser.getint("peopleDetect", "minHeight")
-        self.addWidth = self.parser.getint("peopleDetect", "addWidth")
-        self.addHeight = self.parser.getint("peopleDetect", "addHeight")        
-        self.hitThreshold = self.parser.getfloat("peopleDetect", "hitThreshold")
-        self.winStride = eval(self.parser.get("peopleDetect", "winStride"), {}, {})
-        self.padding = eval(self.parser.get("peopleDetect", "padding"), {}, {})
-        self.scale = self.parser.getfloat("peopleDetect", "scale")
-        self.finalThreshold = self.parser.getfloat("peopleDetect", "finalThreshold")
-        self.useMeanshiftGrouping = self.parser.getboolean("peopleDetect", "useMeanshiftGrouping")
-        self.peopleMarkObjects = self.parser.getboolean("peopleDetect", "markObjects")          
-        self.peopleBoxColor = eval(self.parser.get("peopleDetect", "boxColor"), {}, {})        
-        self.filteredBoxColor = eval(self.parser.get("peopleDetect", "filteredBoxColor"), {}, {})        
-        self.peopleIgnoreAreasBoxColor = eval(self.parser.get("peopleDetect", "ignoreAreasBoxColor"), {}, {})        
-        self.peopleBoxThickness = self.parser.getint("peopleDetect", "boxThickness")
-        if eval(self.parser.get("peopleDetect", "ignoreAreas")) == None:
-                self.peopleIgnoreAreas = None
-        else:
-            self.peopleIgnoreAreas = numpy.array(eval(self.parser.get("peopleDetect", "ignoreAreas"), {}, {}), dtype=numpy.int32)
-        self.playbackFps = self.parser.getfloat("peopleDetect", "playbackFps")
+        self.recordCodec = self.parser.get("video", "recordCodec")
+        # Set recording related data attributes
+        self.record = self.parser.getboolean("motion", "record")
+        self.preRollFrames = self.parser.getint("motion", "preRollFrames")
+        self.postRollFrames = self.parser.getint("motion", "postRollFrames")
+        self.recordQueueSize = self.parser.getint("motion", "recordQueueSize")
+        # Set mask learning related data attributes
+        self.learnMask = self.parser.getboolean("motion", "learnMask")
+        self.maskTrainFrames = self.parser.getint("motion", "maskTrainFrames")
+        self.maskUpdateFrames = self.parser.getint("motion", "maskUpdateFrames")
+        self.noiseFrequency = self.parser.getfloat("motion", "noiseFrequency")
+        self.maskDecay = self.parser.getfloat("motion", "maskDecay")
+        self.maskDilateAmount = self.parser.getint("motion", "maskDilateAmount")
+        self.maskLearner = None
+        # Motion, people detect and tracking are handled by detection session
+        self.session = detect.Session.Session(self.parser)
+        # Each run starts with configured mask
+        self.configuredMask = self.session.maskImg
+        # Set pipeline related data attributes
+        self.usePipeline = self.parser.getboolean("pipeline", "usePipeline")
+        self.decodeQueueSize = self.parser.getint("pipeline", "decodeQueueSize")
+        self.motionQueueSize = self.parser.getint("pipeline", "motionQueueSize")
+        self.writerQueueSize = self.parser.getint("pipeline", "writerQueueSize")
+        self.dropOldest = self.parser.getboolean("pipeline", "dropOldest")
+        if self.usePipeline and self.showWindow:
+            self.logger.warning("Windows are not shown when pipeline is used")
+            self.showWindow = False
+        # Set real-time related data attributes
+        self.useRealTime = self.parser.getboolean("realTime", "useRealTime")
+        self.frameBudget = self.parser.getfloat("realTime", "frameBudget")
+        self.maxLag = self.parser.getfloat("realTime", "maxLag")
+        self.raiseFraction = self.parser.getfloat("realTime", "raiseFraction")
+        self.raiseFrames = self.parser.getint("realTime", "raiseFrames")
+        self.degradedScale = self.parser.getfloat("realTime", "degradedScale")
+        if self.useRealTime and self.usePipeline:
+            self.logger.warning("Real-time mode is not used with pipeline, use dropOldest instead")
+            self.useRealTime = False
+        self.deadline = None
         # Capture file
-        self.logger.info("Reading video from file: %s" % sys.argv[2])
-        self.capture = cv2.VideoCapture(sys.argv[2])
+        self.videoFileName = videoFileName
+        self.outputPath = outputPath
+        self.maskFileName = maskFileName
+        self.logger.info("Reading video from file: %s" % videoFileName)
+        self.capture = cv2.VideoCapture(videoFileName)
         self.writer = cv2.VideoWriter()
+        self.recorder = None
+        # Set results related data attributes
+        self.resultsFile = self.parser.get("results", "resultsFile")
+        if self.resultsFile != "":
+            self.resultSink = pipeline.ResultSink.ResultSink("%s%s" % (outputPath, self.resultsFile), self.parser.getint("results", "batchFrames"))
+        else:
+            self.resultSink = None
         # Setup windows
         if self.showWindow:
             cv2.namedWindow("target", cv2.WINDOW_AUTOSIZE)
@@ -114,42 +129,28 @@ class ProcessVideo():
             cv2.namedWindow("motion", cv2.WINDOW_AUTOSIZE)
             cv2.namedWindow("motion history", cv2.WINDOW_AUTOSIZE)
             cv2.namedWindow("motion ROI", cv2.WINDOW_AUTOSIZE)
-            if self.ignoreMask != None:     
+            if self.session.ignoreMask != None:     
                 cv2.namedWindow("mask", cv2.WINDOW_AUTOSIZE)
 
-    def padRects(self, image, rects, useFilter):
-        """Pad rectangles, get image dimensions, ROI composite image size for display and total ROI pixels"""
-        imgHeight, imgWidth, imgUnknown = image.shape
-        winWidth = 0
-        winHeight = 0
-        roiPixels = 0
-        paddedRects = []
-        # Get consolidated image width and height from rects
-        for x, y, w, h in rects:
-            # Filter based on size if True
-            if (not useFilter) or (useFilter and w > self.minWidth and h > self.minHeight):
-                y1 = y - self.addHeight
-                if y1 < 0:
-                    y1 = 0
-                y2 = y + h + self.addHeight
-                if y2 > imgHeight:
-                    y2 = imgHeight
-                x1 = x - self.addWidth
-                if x1 < 0:
-                    x1 = 0
-                x2 = x + w + self.addWidth
-                if x2 > imgWidth:
-                    x2 = imgWidth
-                paddedRects.append([x1, y1, x2 - x1, y2 - y1])
-                winWidth += x2 - x1
-                winHeight = max(winHeight, y2 - y1)
-            else:
-                self.logger.debug("Width must be %d and height must be %d: w = %d, h = %d" % (self.minWidth, self.minHeight, w, h))
-        return paddedRects, imgHeight, imgWidth, winHeight, winWidth, roiPixels
-                
+    def createReporter(self, reporterType, interval, metricsFileName, port):
+        """Create and start metrics reporter or return None"""
+        if reporterType == "log":
+            reporter = pipeline.Reporter.LogReporter(self.metrics, interval)
+        elif reporterType == "json":
+            self.logger.info("Writing metrics to file: %s" % metricsFileName)
+            reporter = pipeline.Reporter.JsonReporter(self.metrics, interval, metricsFileName)
+        elif reporterType == "http":
+            reporter = pipeline.Reporter.HttpReporter(self.metrics, interval, port)
+        elif reporterType == "none":
+            return None
+        else:
+            raise ValueError("Unknown reporter %s, use none, log, json or http" % reporterType)
+        reporter.start()
+        return reporter
+
     def showRects(self, image, rects):
         """Show all rectangles in a single window"""
-        paddedRects, imgHeight, imgWidth, winHeight, winWidth, roiPixels = self.padRects(image, rects, False)
+        paddedRects, imgHeight, imgWidth, winHeight, winWidth, roiPixels = self.session.padRects(image, rects, False)
         # Black image
         rectsImg = numpy.zeros((winHeight, winWidth, 3), numpy.uint8)
         curX = 0
@@ -162,107 +163,112 @@ class ProcessVideo():
             curX += w
         cv2.imshow("motion ROI", rectsImg)
             
-    def detectPeopleRoi(self, source, target, rects):
-        """Do people detection on ROIs"""  
-        paddedRects, imgHeight, imgWidth, winHeight, winWidth, roiPixels = self.padRects(source, rects, True)
-        sourcePixels = imgHeight * imgWidth
-        foundLocations = []
-        for x, y, w, h in paddedRects:
-            self.logger.debug("detectPeopleRoi %d %d %d %d" % (x, y, w, h))
-            sourceRoi = source[y:y + h, x:x + w]
-            targetRoi = target[y * self.heightMultiplier:y + h * self.heightMultiplier, x * self.widthMultiplier:x + w * self.widthMultiplier]
-            foundLocations = self.people.detect(sourceRoi, targetRoi)
-            if len(foundLocations) > 0:
-                self.logger.debug("Detected people locations: %s" % (foundLocations))
-        return foundLocations     
-    
-    def detectPeople(self, source, target):
-        """Do people detection on full image"""  
-        imgHeight, imgWidth, imgUnknown = source.shape
-        foundLocations = self.people.detect(source, target)
-        if len(foundLocations) > 0:
-            self.logger.debug("Detected people locations: %s" % (foundLocations))
-        return foundLocations     
-  
-    def run(self, useResize, useRoi):
-        """Video processing loop."""
-        self.logger.info("*** Resize = %s, ROI = %s ***" % (useResize, useRoi))
+    def openWriter(self, useResize, useRoi, useCascade, imgWidth, imgHeight):
+        """Build video file name from mode and open writer or start clip recorder"""
+        fileName = "%s%s-%s" % (self.outputPath, self.session.modeName(useResize, useRoi, useCascade), os.path.basename(self.videoFileName))
+        if self.record:
+            # One clip per event named after its first frame
+            root, ext = os.path.splitext(fileName)
+            self.logger.info("Recording clips to files: %s-*%s" % (root, ext))
+            self.recorder = pipeline.ClipRecorder.ClipRecorder("%s-%%06d%s" % (root, ext), cv2.VideoWriter_fourcc(*self.recordCodec),
+                                                               self.fps, imgWidth, imgHeight,
+                                                               self.preRollFrames, self.postRollFrames, self.recordQueueSize)
+        else:
+            self.logger.info("Writing video to file: %s" % fileName)
+            self.writer.open(fileName, int(self.capture.get(cv2.CAP_PROP_FOURCC)), self.session.playbackFps, (imgWidth, imgHeight))
+
+    def run(self, useResize, useRoi, useCascade=False):
+        """Video processing loop. Returns dict of run statistics."""
+        self.logger.info("*** Resize = %s, ROI = %s, Cascade = %s ***" % (useResize, useRoi, useCascade))
+        # Metrics are per run
+        self.metrics.reset()
+        # Rewind so the same capture can be used for every mode
+        self.capture.set(cv2.CAP_PROP_POS_FRAMES, 0)
         s, target = self.capture.read()
         imgHeight, imgWidth, imgUnknown = target.shape
+        resizeWidth = self.session.resizeWidth
+        resizeHeight = self.session.resizeHeight
         frames = int(self.capture.get(cv2.CAP_PROP_FRAME_COUNT)) - 1
-        self.logger.info("Image dimensions: %dw x %dh, resize dimensions: %dw x %dh, %d frames" % (imgWidth, imgHeight, self.resizeWidth, self.resizeHeight, frames))
-        # Build video file name
-        if useResize:
-            fileName = "resize-"
+        self.logger.info("Image dimensions: %dw x %dh, resize dimensions: %dw x %dh, %d frames" % (imgWidth, imgHeight, resizeWidth, resizeHeight, frames))
+        # Analyze every frame or sample at sampleFps
+        self.fps = self.capture.get(cv2.CAP_PROP_FPS)
+        # Some containers do not report FPS
+        if self.fps <= 0.0:
+            self.fps = 30.0
+        if self.session.useSampleFps and self.fps > self.session.sampleFps:
+            self.sampleStep = int(round(self.fps / self.session.sampleFps))
+            self.logger.info("Sampling %4.1f FPS source every %d frames" % (self.fps, self.sampleStep))
         else:
-            fileName = "noresize-"
-        if useRoi:
-            fileName += "roi-"
+            self.sampleStep = 1
+        self.openWriter(useResize, useRoi, useCascade, imgWidth, imgHeight)
+        motion = self.session.start(imgWidth, imgHeight, useResize, useRoi, useCascade, self.fps)
+        if self.learnMask:
+            self.session.setMask(self.configuredMask)
+            self.maskLearner = detect.MaskLearner.MaskLearner(resizeWidth, resizeHeight, self.maskTrainFrames, self.maskUpdateFrames,
+                                                              self.noiseFrequency, self.maskDecay, self.maskDilateAmount)
+        if self.resultSink != None:
+            self.resultSink.start(self.videoFileName, self.session.modeName(useResize, useRoi, useCascade), self.fps, imgWidth, imgHeight)
+        if self.useRealTime:
+            self.qualityLevels = self.realTimeLevels(useResize, useRoi, useCascade)
+            # Default budget is one frame at source FPS
+            budget = self.frameBudget
+            if budget <= 0.0:
+                budget = 1.0 / self.fps
+            self.logger.info("Real-time frame budget %4.3f seconds, %d quality levels" % (budget, len(self.qualityLevels)))
+            self.deadline = pipeline.Deadline.Deadline(budget, self.maxLag, len(self.qualityLevels), self.raiseFraction, self.raiseFrames)
         else:
-            fileName += "noroi-"
-        fileName = sys.argv[3] + fileName + os.path.basename(sys.argv[2])
-        self.logger.info("Writing video to file: %s" % fileName)
-        self.writer.open(fileName, int(self.capture.get(cv2.CAP_PROP_FOURCC)), self.playbackFps, (imgWidth, imgHeight))
+            self.deadline = None
+        if self.usePipeline:
+            start = time.time()
+            imagesDetected, analyzed = self.runPipeline(target, frames, motion)
+            elapse = time.time() - start
+            return self.runStats(useResize, useRoi, useCascade, frames, analyzed, imagesDetected, elapse)
         # Create black history image
-        historyImg = numpy.zeros((self.resizeHeight, self.resizeWidth), numpy.uint8)
+        historyImg = numpy.zeros((resizeHeight, resizeWidth), numpy.uint8)
         if self.showWindow:
             cv2.moveWindow("source", imgWidth + 69, 0)
-            cv2.moveWindow("motion", imgWidth + 69, self.resizeHeight + 103)
-            cv2.moveWindow("motion history", imgWidth + self.resizeWidth + 116, self.resizeHeight + 103)
+            cv2.moveWindow("motion", imgWidth + 69, resizeHeight + 103)
+            cv2.moveWindow("motion history", imgWidth + resizeWidth + 116, resizeHeight + 103)
             cv2.imshow("motion history", historyImg)
-            if self.ignoreMask != None:     
-                cv2.moveWindow("mask", imgWidth + self.resizeWidth + 69, 0)
-                cv2.imshow("mask", self.maskImg)
-            cv2.moveWindow("motion ROI", imgWidth + 69, self.resizeHeight * 2 + 183)
-        motion = detect.Motion.Motion(self.resizeWidth, self.resizeHeight, imgWidth, imgHeight,
-                                         self.kSize, self.alpha, self.blackThreshold, self.maxChange, self.dilateAmount, self.erodeAmount,
-                                         self.markObjects, self.boxColor, self.ignoreAreasBoxColor, self.boxThickness,
-                                         self.ignoreAreas, self.maskImg)
-        if useResize:
-            peopleWidth = self.resizeWidth
-            peopleHeight = self.resizeHeight
-        else:
-            peopleWidth = imgWidth
-            peopleHeight = imgHeight
-        self.people = detect.People.People(peopleWidth, peopleHeight, imgWidth, imgHeight,
-                                             self.hitThreshold, self.winStride, self.padding, self.scale, self.finalThreshold, self.useMeanshiftGrouping,
-                                             self.peopleMarkObjects, self.peopleBoxColor, self.filteredBoxColor, self.peopleIgnoreAreasBoxColor,
-                                             self.peopleBoxThickness, self.peopleIgnoreAreas)
-        # Used for full size image marking
-        self.widthMultiplier = imgWidth / self.resizeWidth
-        self.heightMultiplier = imgHeight / self.resizeHeight
+            if self.session.ignoreMask != None:     
+                cv2.moveWindow("mask", imgWidth + resizeWidth + 69, 0)
+                cv2.imshow("mask", self.session.maskImg)
+            cv2.moveWindow("motion ROI", imgWidth + 69, resizeHeight * 2 + 183)
         imagesDetected = 0
+        analyzed = 0
         sleep = False
         start = time.time()
-        for f in xrange(frames):
-            source = cv2.resize(target, (self.resizeWidth, self.resizeHeight), interpolation=cv2.INTER_NEAREST)            
-            movementLocations = motion.detect(source, target)
-            if len(movementLocations) > 0:
-                self.logger.debug("%3.2f%% motion detected on frame %d, locations: %s" % (motion.motionPercent, f, movementLocations))
+        self.start = start
+        f = 0
+        while f < frames:
+            analyzed += 1
+            frameStart = time.time()
+            result = self.session.detectMotion(f, target)
+            if self.maskLearner != None:
+                self.learnMotion(motion)
+            if result.active:
                 if self.showWindow:
-                    historyImg = numpy.bitwise_or(motion.grayImg, historyImg)
-                if useResize:
-                    if useRoi:
-                        foundLocations = self.detectPeopleRoi(source, target, movementLocations)
-                    else:
-                        foundLocations = self.detectPeople(source, target)
-                else:
-                    foundLocations = self.detectPeople(target, target)
+                    cv2.bitwise_or(motion.grayImg, historyImg, dst=historyImg)
+                self.session.detectPeopleFrame(result)
+                if self.maskLearner != None:
+                    self.learnPeople(result)
                 if self.showWindow:
-                    self.showRects (source, movementLocations)
-                if len(foundLocations) > 0:
-                    self.logger.debug("People detected on frame %d, locations: %s" % (f, foundLocations))
-                    self.writer.write(target)
+                    self.showRects (result.source, result.movementLocations)
+                if len(result.foundLocations) > 0:
                     imagesDetected += 1
-                    sleep = True
-                else:
-                    sleep = False                
                 sleep = True
             else:
                 sleep = False
+            self.writeFrame(f, target, len(result.foundLocations) > 0)
+            if self.resultSink != None:
+                self.resultSink.add(result)
+            frameTime = time.time() - frameStart
+            self.metrics.time("frame", frameTime)
+            if self.deadline != None:
+                self.adjustQuality(frameTime)
             if self.showWindow:  
                 cv2.imshow("target", target)
-                cv2.imshow("source", source)
+                cv2.imshow("source", result.source)
                 cv2.imshow("motion history", historyImg)
                 if motion.grayImg != None:
                     cv2.imshow("motion", motion.grayImg)
@@ -272,54 +278,247 @@ class ProcessVideo():
                     key = cv2.waitKey(-1)
                 if key == 27:
                     break
-            s, target = self.capture.read()
-        if self.showWindow:
-            self.logger.info("Writing mask to file: %s" % sys.argv[4])
+            f, s, target = self.nextFrame(f, frames, motion.referenceReset)
+            if not s:
+                break
+        if self.showWindow and self.maskLearner == None:
+            self.logger.info("Writing mask to file: %s" % self.maskFileName)
             # Invert image for mask (black masks motion, white detects motion)
             return_val, historyImg = cv2.threshold(historyImg, 127, 255, cv2.THRESH_BINARY_INV)
-            cv2.imwrite(sys.argv[4], historyImg)
+            cv2.imwrite(self.maskFileName, historyImg)
         elapse = time.time() - start
-        self.logger.info("%d frames, %d frames with people, elapse time: %4.2f seconds, %4.1f FPS" % (frames, imagesDetected, elapse, frames / elapse))
+        return self.runStats(useResize, useRoi, useCascade, frames, analyzed, imagesDetected, elapse)
+
+    def learnMotion(self, motion):
+        """Count motion before ignore mask and use learned mask when it is updated"""
+        # Whole frame changes while camera adjusts
+        if not motion.referenceReset and self.maskLearner.addMotion(motion.motionImg):
+            maskImg = self.maskLearner.maskImg
+            # Areas masked on purpose stay masked
+            if self.configuredMask != None:
+                maskImg = cv2.bitwise_and(self.configuredMask, maskImg)
+            self.session.setMask(maskImg)
+            self.logger.info("Learned mask ignores %4.1f%% of frame (%4.1f%% with configured mask), writing to file: %s" %
+                             (100.0 * self.maskLearner.maskedPixels / maskImg.size, 100.0 * (maskImg.size - cv2.countNonZero(maskImg)) / maskImg.size,
+                              self.maskFileName))
+            cv2.imwrite(self.maskFileName, maskImg)
+
+    def learnPeople(self, result):
+        """Count raw HOG hits in motion image coordinates"""
+        rects = result.rawLocations
+        if not result.peopleInSource:
+            rects = self.session.scaleRects(rects, 1.0 / result.widthScale, 1.0 / result.heightScale)
+        self.maskLearner.addPeople(rects)
+
+    def writeFrame(self, f, target, detected):
+        """Add frame to clip recorder or write it if people were detected"""
+        start = time.time()
+        if self.recorder != None:
+            self.recorder.add(f, target, detected)
+        elif detected:
+            self.writer.write(target)
+        self.metrics.lap("video.encode", start)
+
+    def realTimeLevels(self, useResize, useRoi, useCascade):
+        """Quality levels from best to cheapest as (useResize, useRoi, useCascade, scale)"""
+        scale = self.session.scale
+        levels = [(useResize, useRoi, useCascade, scale)]
+        # Motion ROIs are cheaper than full frame or cascade detection
+        if not (useResize and useRoi and not useCascade):
+            levels.append((True, True, False, scale))
+        # Bigger scale step means fewer HOG pyramid levels
+        if self.degradedScale > scale:
+            levels.append((True, True, False, self.degradedScale))
+        return levels
+
+    def adjustQuality(self, frameTime):
+        """Change detection quality level if frame time calls for it"""
+        if self.deadline.update(frameTime):
+            useResize, useRoi, useCascade, scale = self.qualityLevels[self.deadline.level]
+            self.logger.debug("Quality level %d: %s, scale %3.2f" % (self.deadline.level, self.session.modeName(useResize, useRoi, useCascade), scale))
+            self.session.select(useResize, useRoi, useCascade, scale)
+
+    def runStats(self, useResize, useRoi, useCascade, frames, analyzed, imagesDetected, elapse):
+        """Close video file, log results and return run statistics"""
+        if self.recorder != None:
+            self.recorder.close(frames)
+        else:
+            self.writer.release()
+        if self.resultSink != None:
+            self.resultSink.flush()
+        self.session.stop(frames)
+        self.logger.info("%d frames, %d analyzed, %d frames with people, elapse time: %4.2f seconds, %4.1f FPS" % (frames, analyzed, imagesDetected, elapse, frames / elapse))
+        snapshot = self.metrics.snapshot()
+        timers = snapshot["timers"]
+        for name in sorted(timers, key=lambda name: timers[name]["total"], reverse=True):
+            timer = timers[name]
+            self.logger.info("Stage %s: %d calls, total %4.2f seconds, mean %4.2f ms, p95 %4.1f ms, max %4.1f ms" %
+                             (name, timer["count"], timer["total"], timer["mean"] * 1000.0, timer["p95"] * 1000.0, timer["max"] * 1000.0))
+        self.logger.info("Counters: %s" % ", ".join("%s %d" % (name, count) for name, count in sorted(snapshot["counters"].items())))
+        stats = {"video": self.videoFileName, "mode": self.session.modeName(useResize, useRoi, useCascade), "frames": frames,
+                 "analyzed": analyzed, "imagesDetected": imagesDetected, "elapse": elapse, "fps": frames / elapse, "metrics": snapshot}
+        if self.recorder != None:
+            self.logger.info("%d clips recorded" % len(self.recorder.clips))
+            stats["clips"] = self.recorder.clips
+            self.recorder = None
+        if self.maskLearner != None:
+            if self.maskLearner.maskImg == None:
+                self.logger.info("Mask not learned, %d frames needed" % self.maskTrainFrames)
+            else:
+                self.logger.info("Mask updated %d times, ignores %4.1f%% of frame" % (self.maskLearner.updates, 100.0 * self.maskLearner.maskedPixels / self.maskLearner.maskImg.size))
+            stats["maskUpdates"] = self.maskLearner.updates
+            self.maskLearner = None
+        if self.deadline != None:
+            levels = []
+            for level, levelFrames in enumerate(self.deadline.levelFrames):
+                useResize, useRoi, useCascade, scale = self.qualityLevels[level]
+                name = "%s scale %3.2f" % (self.session.modeName(useResize, useRoi, useCascade), scale)
+                self.logger.info("Quality level %d (%s): %d frames" % (level, name, levelFrames))
+                levels.append({"level": name, "frames": levelFrames})
+            self.logger.info("Real-time: %d frames skipped, quality lowered %d times, raised %d times" % (self.deadline.skipped, self.deadline.lowered, self.deadline.raised))
+            stats["realTime"] = {"levels": levels, "skipped": self.deadline.skipped, "lowered": self.deadline.lowered, "raised": self.deadline.raised}
+        return stats
+
+    def nextFrame(self, f, frames, referenceReset):
+        """Read next frame to analyze.
+        
+        When sampling, frames between samples and skipFrames frames after a motion
+        reference reset (referenceReset is True) are advanced with grab(), which skips
+        retrieving and converting them (most codecs still decode them). Returns frame
+        number, read status and frame.
+        
+        """
+        skip = self.sampleStep - 1
+        # Let moving average settle after camera adjusted
+        if self.session.useSampleFps and referenceReset:
+            skip += self.session.skipFrames
+        # Live input kept coming while frame was processed
+        if self.deadline != None:
+            behind = self.deadline.behind(f + 1, time.time() - self.start, self.fps)
+            if behind > skip:
+                self.deadline.skipped += behind - skip
+                skip = behind
+        start = time.time()
+        for i in xrange(skip):
+            if f + 1 >= frames:
+                break
+            self.capture.grab()
+            f += 1
+        s, target = self.capture.read()
+        self.metrics.lap("video.decode", start)
+        return f + 1, s, target
+
+    def runPipeline(self, target, frames, motion):
+        """Video processing using decode, motion, people detection and writer stages.
+        
+        Each stage runs on its own thread joined by bounded queues, so decoding and
+        encoding overlap with detection. Returns number of frames with people and number
+        of frames analyzed. Raises RuntimeError if any stage failed.
+        
+        """
+        decodeQueue = pipeline.FrameQueue.FrameQueue(self.decodeQueueSize, self.dropOldest)
+        motionQueue = pipeline.FrameQueue.FrameQueue(self.motionQueueSize, self.dropOldest)
+        writerQueue = pipeline.FrameQueue.FrameQueue(self.writerQueueSize, self.dropOldest)
+        counts = {"imagesDetected": 0}
+        # Set by motion stage on reference reset, cleared by decoder when it skips frames
+        resetEvent = threading.Event()
+        # Clips and results need every analyzed frame in order
+        keepAll = self.recorder != None or self.resultSink != None
+
+        def decodeFrames():
+            # First frame was already read to get dimensions. Reference resets are seen
+            # by the decoder a few frames late since motion runs on another thread.
+            f, s, frame = 0, True, target
+            while f < frames and s:
+                yield (f, frame)
+                # Resets seen since last frame are skipped once
+                referenceReset = resetEvent.is_set()
+                if referenceReset:
+                    resetEvent.clear()
+                f, s, frame = self.nextFrame(f, frames, referenceReset)
+
+        def motionFrame(item):
+            f, frame = item
+            start = time.time()
+            # Resized frame is handed to another thread, so it is not reused
+            source = cv2.resize(frame, (self.session.resizeWidth, self.session.resizeHeight), interpolation=cv2.INTER_NEAREST)
+            self.metrics.lap("video.resize", start)
+            result = self.session.detectMotion(f, frame, source)
+            # Motion state is only read on this thread, the decoder gets resets through the event
+            if motion.referenceReset:
+                resetEvent.set()
+            if self.maskLearner != None:
+                self.learnMotion(motion)
+            # Only frames with motion go on to people detection unless every frame is kept
+            if result.active or keepAll:
+                return result
+
+        def peopleFrame(result):
+            self.session.detectPeopleFrame(result)
+            if self.maskLearner != None:
+                self.learnPeople(result)
+            if len(result.foundLocations) > 0 or keepAll:
+                return result
+
+        def writeFrame(result):
+            detected = len(result.foundLocations) > 0
+            self.writeFrame(result.f, result.target, detected)
+            if self.resultSink != None:
+                self.resultSink.add(result)
+            if detected:
+                counts["imagesDetected"] += 1
+
+        stages = [pipeline.Stage.Stage("decode", decodeFrames, None, decodeQueue),
+                  pipeline.Stage.Stage("motion", motionFrame, decodeQueue, motionQueue),
+                  pipeline.Stage.Stage("people", peopleFrame, motionQueue, writerQueue),
+                  pipeline.Stage.Stage("writer", writeFrame, writerQueue, None)]
+        for stage in stages:
+            stage.start()
+        for stage in stages:
+            stage.join()
+        for stage in stages:
+            self.logger.info("Stage %s: %d items, busy time: %4.2f seconds" % (stage.name, stage.items, stage.busyTime))
+        if self.dropOldest:
+            self.logger.info("Dropped frames: decode %d, motion %d, writer %d" % (decodeQueue.dropped, motionQueue.dropped, writerQueue.dropped))
+        # Failed stages only drain their input, so counts would be partial
+        failed = [stage.name for stage in stages if stage.failed]
+        if len(failed) > 0:
+            raise RuntimeError("Pipeline stages failed: %s" % ", ".join(failed))
+        return counts["imagesDetected"], stages[0].items
 
     def cleanUp(self):
+        if self.reporter != None:
+            self.reporter.stop()
+        self.session.close()
+        if self.resultSink != None:
+            self.resultSink.close()
         if self.showWindow:
             cv2.destroyWindow("target")
             cv2.destroyWindow("source")
             cv2.destroyWindow("motion")
             cv2.destroyWindow("motion history")
             cv2.destroyWindow("motion ROI")
-            if self.ignoreMask != None:     
+            if self.session.ignoreMask != None:     
                 cv2.destroyWindow("mask")
+        self.capture.release()
         del self.writer
         
 if __name__ == "__main__":
     try:
-        process = ProcessVideo(sys.argv[1])
-        if process.profile:
-            process.logger.info("Profiling enabled")
-            cProfile.run("process.run(useResize=False, useRoi=False)", "%srestats" % sys.argv[3])
-            stats = pstats.Stats("%srestats" % sys.argv[3])
-            stats.strip_dirs().sort_stats('time').print_stats(10)
-        else:
-            process.run(useResize=False, useRoi=False)
-        process.cleanUp()
-        process = ProcessVideo(sys.argv[1])
-        if process.profile:
-            process.logger.info("Profiling enabled")
-            cProfile.run("process.run(useResize=True, useRoi=False)", "%srestats" % sys.argv[3])
-            stats = pstats.Stats("%srestats" % sys.argv[3])
-            stats.strip_dirs().sort_stats('time').print_stats(10)
-        else:
-            process.run(useResize=True, useRoi=False)
-        process.cleanUp()
-        process = ProcessVideo(sys.argv[1])
-        if process.profile:
-            process.logger.info("Profiling enabled")
-            cProfile.run("process.run(useResize=True, useRoi=True)", "%srestats" % sys.argv[3])
-            stats = pstats.Stats("%srestats" % sys.argv[3])
-            stats.strip_dirs().sort_stats('time').print_stats(10)
-        else:
-            process.run(useResize=True, useRoi=True)
+        modeNames = ["noresize-noroi", "resize-noroi", "resize-roi"]
+        # Configuration, capture and detectors are set up once for all modes
+        process = ProcessVideo(sys.argv[1], sys.argv[2], sys.argv[3], sys.argv[4])
+        if process.session.runCascade:
+            modeNames.append("resize-cascade")
+        for modeName in modeNames:
+            useResize, useRoi, useCascade = detect.Session.Session.modes[modeName]
+            if process.profile:
+                process.logger.info("Profiling enabled")
+                cProfile.run("process.run(useResize=%s, useRoi=%s, useCascade=%s)" % (useResize, useRoi, useCascade), "%srestats" % sys.argv[3])
+                stats = pstats.Stats("%srestats" % sys.argv[3])
+                stats.strip_dirs().sort_stats('time').print_stats(10)
+            else:
+                process.run(useResize=useResize, useRoi=useRoi, useCascade=useCascade)
         process.cleanUp()
     except:
         sys.stderr.write("%s " % datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S,%f"))
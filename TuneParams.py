@@ -0,0 +1,363 @@
+#!/usr/bin/env python
+"""
+Created on Oct 18, 2026
+
+@author: sgoldsmith
+
+Copyright (c) Steven P. Goldsmith
+
+All rights reserved.
+"""
+
+import ConfigParser, logging, sys, os, traceback, time, datetime, itertools, json, cPickle, multiprocessing, numpy, cv2, detect.Session, detect.Rects
+
+# Parameters by stage. Changing one only invalidates its own stage and the ones after.
+motionParams = ("kSize", "blackThreshold", "dilateAmount", "erodeAmount")
+roiParams = ("addWidth", "addHeight")
+hogParams = ("winStride", "scale", "hitThreshold")
+
+# Stage results of this worker process keyed by stage and the parameters they depend on
+stageCache = {}
+# Resized frames of the last video decoded by this worker process
+decoded = {}
+
+def initWorker(cache):
+    """Start worker with stage results from earlier runs"""
+    global stageCache
+    stageCache = cache
+
+def readConfig(configFileName, values):
+    """Session config with parameter values and without marking"""
+    parser = ConfigParser.SafeConfigParser()
+    parser.read(configFileName)
+    config = detect.Session.Session.readConfig(parser)
+    config.update(values)
+    # Frames are reused across parameter sets, so they must not be marked
+    config["markObjects"] = False
+    config["peopleMarkObjects"] = False
+    return config
+
+def videoKey(videoFileName):
+    """Identify video by path, size and modification time"""
+    fileStat = os.stat(videoFileName)
+    return (os.path.abspath(videoFileName), fileStat.st_size, fileStat.st_mtime)
+
+def fileKey(fileName):
+    """Identify optional file by path and modification time, so rewritten files are new keys"""
+    if fileName == None:
+        return None
+    return (os.path.abspath(fileName), os.stat(fileName).st_mtime)
+
+def areasKey(areas):
+    """Hashable ignore areas"""
+    if areas is None:
+        return None
+    return tuple(tuple(int(v) for v in area) for area in areas)
+
+def videoSize(videoFileName):
+    """Frame width and height without decoding"""
+    capture = cv2.VideoCapture(videoFileName)
+    size = int(capture.get(cv2.CAP_PROP_FRAME_WIDTH)), int(capture.get(cv2.CAP_PROP_FRAME_HEIGHT))
+    capture.release()
+    return size
+
+def readFrames(videoFileName, maxFrames):
+    """Generate up to maxFrames frames (0 for all)"""
+    capture = cv2.VideoCapture(videoFileName)
+    f = 0
+    s, target = capture.read()
+    while s and (maxFrames <= 0 or f < maxFrames):
+        yield target
+        f += 1
+        s, target = capture.read()
+    capture.release()
+
+def sourceFrames(videoFileName, maxFrames, resizeWidth, resizeHeight):
+    """Resized frames, decoded once per worker and only when a stage needs pixels"""
+    key = (videoKey(videoFileName), maxFrames, resizeWidth, resizeHeight)
+    if key not in decoded:
+        decoded.clear()
+        decoded[key] = [cv2.resize(target, (resizeWidth, resizeHeight), interpolation=cv2.INTER_NEAREST)
+                        for target in readFrames(videoFileName, maxFrames)]
+    return decoded[key]
+
+def matchCount(rects, referenceRects, minOverlap):
+    """Greedy one to one matches of rects to reference rects with IoU of at least minOverlap"""
+    if len(rects) == 0 or len(referenceRects) == 0:
+        return 0
+    overlaps = detect.Rects.iou(detect.Rects.toArray(rects), detect.Rects.toArray(referenceRects))
+    matches = 0
+    while True:
+        i, j = numpy.unravel_index(numpy.argmax(overlaps), overlaps.shape)
+        if overlaps[i, j] < minOverlap:
+            return matches
+        matches += 1
+        overlaps[i, :] = -1.0
+        overlaps[:, j] = -1.0
+
+def runReference(job):
+    """People per frame in full resolution mode, the detections the others are compared to"""
+    configFileName, videoFileName, maxFrames = job
+    config = readConfig(configFileName, {})
+    key = ("reference", videoKey(videoFileName), maxFrames, config["winStride"], config["padding"], config["scale"],
+           config["hitThreshold"], config["finalThreshold"], config["useMeanshiftGrouping"], areasKey(config["peopleIgnoreAreas"]),
+           config["minWidth"], config["minHeight"])
+    if key in stageCache:
+        return videoFileName, key, stageCache[key], False
+    session = detect.Session.Session(config)
+    imgWidth, imgHeight = videoSize(videoFileName)
+    session.start(imgWidth, imgHeight, False, False, False)
+    people = []
+    start = time.time()
+    for target in readFrames(videoFileName, maxFrames):
+        people.append([tuple(int(v) for v in rect) for rect in session.detectPeople(target, target)])
+    session.close()
+    return videoFileName, key, (people, time.time() - start), True
+
+def runSweep(job):
+    """Evaluate one set of motion parameters with every ROI and HOG parameter set.
+
+    Returns people per frame in full frame coordinates and detection seconds (motion,
+    HOG and filtering, measured when each stage result was computed) for each parameter
+    set, stage results computed by this job and stage cache hits and misses.
+
+    """
+    configFileName, videoFileName, maxFrames, useRoi, motionValues, combos = job
+    config = readConfig(configFileName, motionValues)
+    resizeWidth, resizeHeight = config["resizeWidth"], config["resizeHeight"]
+    imgWidth, imgHeight = videoSize(videoFileName)
+    vKey = videoKey(videoFileName)
+    computed = {}
+    counts = {"motionHits": 0, "motionMisses": 0, "hogHits": 0, "hogMisses": 0}
+    # Motion rectangles per frame keyed by motion parameters
+    motionKey = ("motion", vKey, maxFrames, resizeWidth, resizeHeight, config["alpha"], config["maxChange"], config["useGrayEngine"],
+                 config["blobExtractor"], config["gridSize"], fileKey(config["ignoreMask"]),
+                 areasKey(config["ignoreAreas"])) + tuple(config[name] for name in motionParams)
+    if motionKey in stageCache:
+        motionRects, motionSeconds = stageCache[motionKey]
+        counts["motionHits"] += 1
+    else:
+        session = detect.Session.Session(config)
+        motion = session.start(imgWidth, imgHeight, True, useRoi, False)
+        motionRects = []
+        start = time.time()
+        for source in sourceFrames(videoFileName, maxFrames, resizeWidth, resizeHeight):
+            motionRects.append([tuple(int(v) for v in rect) for rect in motion.detect(source, source)])
+        motionSeconds = time.time() - start
+        stageCache[motionKey] = computed[motionKey] = (motionRects, motionSeconds)
+        counts["motionMisses"] += 1
+    # Only used for its shape by padRects
+    shapeImg = numpy.empty((resizeHeight, resizeWidth, 3), numpy.uint8)
+    sourcePixels = resizeWidth * resizeHeight
+    results = []
+    for values in combos:
+        comboConfig = dict(config)
+        comboConfig.update(values)
+        session = detect.Session.Session(comboConfig)
+        session.start(imgWidth, imgHeight, True, useRoi, False)
+        people = session.people
+        hogKey = ("hog", vKey, maxFrames, resizeWidth, resizeHeight, comboConfig["padding"], comboConfig["finalThreshold"],
+                  comboConfig["useMeanshiftGrouping"]) + tuple(comboConfig[name] for name in hogParams)
+        seconds = motionSeconds
+        found = []
+        for f, rects in enumerate(motionRects):
+            locations = []
+            if len(rects) > 0:
+                regions = [(0, 0, resizeWidth, resizeHeight)]
+                if useRoi:
+                    paddedRects, h, w, winHeight, winWidth, roiPixels = session.padRects(shapeImg, rects, True)
+                    # Same full frame fallback as Session.detectPeopleRoi
+                    if roiPixels <= session.maxRoiFraction * sourcePixels:
+                        regions = paddedRects
+                for x, y, w, h in regions:
+                    # HOG hits keyed by HOG parameters and ROI
+                    key = hogKey + (f, x, y, w, h)
+                    if key in stageCache:
+                        hits, hogSeconds = stageCache[key]
+                        counts["hogHits"] += 1
+                    else:
+                        source = sourceFrames(videoFileName, maxFrames, resizeWidth, resizeHeight)[f]
+                        start = time.time()
+                        hitLocations, hitWeights = people.detectMultiScale(source[y:y + h, x:x + w])
+                        hogSeconds = time.time() - start
+                        hits = [tuple(int(v) for v in rect) for rect in hitLocations]
+                        stageCache[key] = computed[key] = (hits, hogSeconds)
+                        counts["hogMisses"] += 1
+                    seconds += hogSeconds
+                    if len(hits) > 0:
+                        start = time.time()
+                        for fx, fy, fw, fh in people.filterPeople(hits):
+                            locations.append((fx + x, fy + y, fw, fh))
+                        seconds += time.time() - start
+            found.append(session.scaleRects(locations, session.widthScale, session.heightScale))
+        session.close()
+        results.append((values, found, seconds))
+    return videoFileName, motionValues, results, computed, counts
+
+class TuneParams():
+    """Sweep motion, ROI and HOG parameters and find the fastest that still find the people.
+
+    Each parameter in [tune] is a list of values to try. Every combination is run in the
+    configured mode on each video and compared to full resolution mode (noresize-noroi
+    with the configuration's HOG parameters). A person counts as found when a box
+    overlaps the full resolution box by at least minOverlap IoU. Agreement is F1 of
+    people found and FPS is frames over detection time (decode excluded, it is the same
+    for every combination).
+
+    Combinations run in parallel, one job per video and set of motion parameters. Stage
+    results are memoized: motion rectangles keyed by motion parameters and HOG hits keyed
+    by HOG parameters and ROI, together with the time they took to compute. When only a
+    HOG parameter changes motion is not run again, and when every HOG hit is known the
+    video is not decoded at all. Stage results are kept in cacheFile in the output path
+    for the next sweep.
+
+    The Pareto front of FPS against agreement and the fastest combination with at least
+    minAgreement are logged and written with every result to tune.json.
+
+    sys.argv[1] = Configuration file
+    sys.argv[2] = Comma separated video files
+    sys.argv[3] = Output path
+
+    ./config/test.ini ./resources/walking.avi,./resources/edger.avi ./output/
+
+    """
+
+    def __init__(self, configFileName, outputPath):
+        self.configFileName = configFileName
+        self.outputPath = outputPath
+        parser = ConfigParser.SafeConfigParser()
+        parser.read(configFileName)
+        self.logger = logging.getLogger("TuneParams")
+        self.logger.setLevel(parser.get("logging", "level"))
+        if self.logger.handlers == []:
+            formatter = logging.Formatter(parser.get("logging", "formatter"))
+            handler = logging.StreamHandler(sys.stdout)
+            handler.setFormatter(formatter)
+            self.logger.addHandler(handler)
+        self.logger.info("Configuring from file: %s" % configFileName)
+        self.workers = parser.getint("tune", "workers")
+        if self.workers <= 0:
+            self.workers = multiprocessing.cpu_count()
+        self.maxFrames = parser.getint("tune", "maxFrames")
+        modeName = parser.get("tune", "mode")
+        if modeName not in ("resize-noroi", "resize-roi"):
+            raise ValueError("Unknown mode %s, use resize-noroi or resize-roi" % modeName)
+        self.useRoi = modeName == "resize-roi"
+        self.minOverlap = parser.getfloat("tune", "minOverlap")
+        self.minAgreement = parser.getfloat("tune", "minAgreement")
+        self.cacheFile = parser.get("tune", "cacheFile")
+        # Each parameter is a list of values to try
+        self.grid = {}
+        for name in motionParams + roiParams + hogParams:
+            values = eval(parser.get("tune", name), {}, {})
+            if not isinstance(values, list):
+                values = [values]
+            self.grid[name] = values
+
+    def combinations(self, names):
+        """List of dicts of every combination of values of parameter names"""
+        return [dict(zip(names, values)) for values in itertools.product(*[self.grid[name] for name in names])]
+
+    def loadCache(self):
+        """Stage results of earlier sweeps"""
+        if self.cacheFile == "" or not os.path.exists("%s%s" % (self.outputPath, self.cacheFile)):
+            return {}
+        self.logger.info("Reading stage cache from file: %s%s" % (self.outputPath, self.cacheFile))
+        with open("%s%s" % (self.outputPath, self.cacheFile), "rb") as cacheFile:
+            return cPickle.load(cacheFile)
+
+    def saveCache(self, cache):
+        if self.cacheFile != "":
+            self.logger.info("Writing %d stage results to file: %s%s" % (len(cache), self.outputPath, self.cacheFile))
+            with open("%s%s" % (self.outputPath, self.cacheFile), "wb") as cacheFile:
+                cPickle.dump(cache, cacheFile, cPickle.HIGHEST_PROTOCOL)
+
+    def pareto(self, results):
+        """Results no other result beats on both FPS and agreement, fastest first"""
+        front = []
+        for result in sorted(results, key=lambda result: (-result["fps"], -result["agreement"])):
+            if len(front) == 0 or result["agreement"] > front[-1]["agreement"]:
+                front.append(result)
+        return front
+
+    def run(self, videoFileNames):
+        """Run sweep and return report"""
+        cache = self.loadCache()
+        combos = self.combinations(roiParams + hogParams)
+        motionCombos = self.combinations(motionParams)
+        self.logger.info("Sweeping %d combinations over %d videos with %d workers" % (len(combos) * len(motionCombos), len(videoFileNames), self.workers))
+        start = time.time()
+        pool = multiprocessing.Pool(self.workers, initWorker, (cache,))
+        try:
+            references = {}
+            for videoFileName, key, reference, computed in pool.imap_unordered(runReference, [(self.configFileName, videoFileName, self.maxFrames) for videoFileName in videoFileNames]):
+                references[videoFileName] = reference
+                if computed:
+                    cache[key] = reference
+                people, seconds = reference
+                self.logger.info("Reference %s: %d frames, %d people, %4.1f FPS" % (videoFileName, len(people), sum(len(rects) for rects in people), len(people) / seconds))
+            jobs = [(self.configFileName, videoFileName, self.maxFrames, self.useRoi, motionValues, combos)
+                    for motionValues in motionCombos for videoFileName in videoFileNames]
+            totals = {}
+            counts = {"motionHits": 0, "motionMisses": 0, "hogHits": 0, "hogMisses": 0}
+            for videoFileName, motionValues, results, computed, jobCounts in pool.imap_unordered(runSweep, jobs):
+                cache.update(computed)
+                for name in counts:
+                    counts[name] += jobCounts[name]
+                referencePeople = references[videoFileName][0]
+                for values, found, seconds in results:
+                    params = dict(motionValues)
+                    params.update(values)
+                    key = tuple(sorted(params.items()))
+                    total = totals.setdefault(key, {"params": params, "frames": 0, "seconds": 0.0, "people": 0, "referencePeople": 0, "matches": 0})
+                    total["frames"] += len(found)
+                    total["seconds"] += seconds
+                    for rects, referenceRects in zip(found, referencePeople):
+                        total["people"] += len(rects)
+                        total["referencePeople"] += len(referenceRects)
+                        total["matches"] += matchCount(rects, referenceRects, self.minOverlap)
+        finally:
+            pool.close()
+            pool.join()
+        self.logger.info("Sweep took %4.2f seconds, motion cache %d hits %d misses, HOG cache %d hits %d misses" %
+                         (time.time() - start, counts["motionHits"], counts["motionMisses"], counts["hogHits"], counts["hogMisses"]))
+        self.saveCache(cache)
+        results = []
+        for total in totals.values():
+            precision = float(total["matches"]) / max(total["people"], 1)
+            recall = float(total["matches"]) / max(total["referencePeople"], 1)
+            if precision + recall > 0.0:
+                agreement = 2.0 * precision * recall / (precision + recall)
+            else:
+                agreement = 0.0
+            results.append({"params": total["params"], "fps": total["frames"] / max(total["seconds"], 0.000001), "precision": precision,
+                            "recall": recall, "agreement": agreement, "people": total["people"]})
+        front = self.pareto(results)
+        for result in front:
+            self.logger.info("Pareto %6.1f FPS, agreement %4.2f (precision %4.2f, recall %4.2f): %s" %
+                             (result["fps"], result["agreement"], result["precision"], result["recall"], result["params"]))
+        # Fastest that still finds the people or closest to it
+        good = [result for result in front if result["agreement"] >= self.minAgreement]
+        if len(good) > 0:
+            best = good[0]
+        else:
+            self.logger.warning("No combination reached agreement %4.2f" % self.minAgreement)
+            best = front[-1]
+        self.logger.info("Best %4.1f FPS, agreement %4.2f, set in configuration:" % (best["fps"], best["agreement"]))
+        for name in motionParams + roiParams + hogParams:
+            self.logger.info("%s = %s" % (name, best["params"][name]))
+        report = {"created": datetime.datetime.now().isoformat(), "config": self.configFileName, "videos": videoFileNames,
+                  "maxFrames": self.maxFrames, "useRoi": self.useRoi, "minOverlap": self.minOverlap, "minAgreement": self.minAgreement,
+                  "results": sorted(results, key=lambda result: -result["fps"]), "front": front, "best": best}
+        self.logger.info("Writing report to file: %stune.json" % self.outputPath)
+        with open("%stune.json" % self.outputPath, "w") as reportFile:
+            json.dump(report, reportFile, indent=2, sort_keys=True)
+        return report
+
+if __name__ == "__main__":
+    try:
+        tuner = TuneParams(sys.argv[1], sys.argv[3])
+        tuner.run(sys.argv[2].split(","))
+    except:
+        sys.stderr.write("%s " % datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S,%f"))
+        traceback.print_exc(file=sys.stderr)
@@ -8,7 +8,7 @@ Copyright (c) Steven P. Goldsmith
 All rights reserved.
 """
 
-import abc, cv2
+import abc, cv2, numpy, Rects
 
 class DetectBase():
     """Detect abstract base class.
@@ -19,30 +19,30 @@ class DetectBase():
 
     __metaclass__ = abc.ABCMeta
 
-    def inside(self, r, q):
-        """See if one rectangle inside another"""
-        rx, ry, rw, rh = r
-        qx, qy, qw, qh = q
-        return rx > qx and ry > qy and rx + rw < qx + qw and ry + rh < qy + qh
-    
-    def insideIgnoreAreas(self, r):
-        """See if rectangle inside areas that are ignored"""
-        inside = False
-        for area in self.ignoreAreas:
-            # If at least inside one ignore area
-            if self.inside(r, area):
-                inside = True
-                break
-        return inside
-    
+    def filterLocations(self, locations, dropNested):
+        """Drop locations inside ignore areas and optionally ones inside other locations.
+        
+        Uses batched rectangle tests against ignoreAreaRects compiled by the detector.
+        
+        """
+        if len(locations) == 0:
+            return []
+        rects = Rects.toArray(locations)
+        keep = numpy.ones(len(rects), dtype=bool)
+        if dropNested:
+            keep &= ~Rects.nested(rects)
+        if self.ignoreAreas != None:
+            keep &= ~self.ignoreAreaRects.inside(rects)
+        return [locations[i] for i in numpy.flatnonzero(keep)]
+
     def mark(self, source, target, rects, widthMul, heightMul, boxColor):
         """Mark detected objects in image"""
         for x, y, w, h in rects:
             # Mark source
             cv2.rectangle(source, (x, y), (x + w, y + h), boxColor, self.boxThickness)
             # Mark target
-            cv2.rectangle(target, (x * widthMul, y * heightMul),
-                          ((x + w) * widthMul, (y + h) * heightMul),
+            cv2.rectangle(target, (int(x * widthMul), int(y * heightMul)),
+                          (int((x + w) * widthMul), int((y + h) * heightMul)),
                           boxColor, self.boxThickness)
     
     @abc.abstractmethod
@@ -0,0 +1,81 @@
+"""
+Created on Oct 18, 2026
+
+@author: sgoldsmith
+
+Copyright (c) Steven P. Goldsmith
+
+All rights reserved.
+"""
+
+import threading, numpy, cv2
+
+class MaskLearner():
+    """Learns an ignore mask from motion that never turns into people.
+
+    Counts how often each pixel has motion (before any ignore mask) and how often it is
+    inside a raw HOG hit. After trainFrames frames, and every updateFrames frames after
+    that, pixels with motion on at least noiseFrequency of frames and no HOG hits are
+    masked and grown by dilateAmount pixels. Counts are then multiplied by decay, so
+    areas that stop flickering or start having people come back.
+
+    The mask is white where motion is detected and black where it is ignored, the same
+    as ignoreMask files. Motion and hits can be added from different threads.
+
+    """
+
+    def __init__(self, width, height, trainFrames, updateFrames, noiseFrequency, decay, dilateAmount):
+        self.trainFrames = trainFrames
+        self.updateFrames = updateFrames
+        self.noiseFrequency = noiseFrequency
+        self.decay = decay
+        self.motionCounts = numpy.zeros((height, width), numpy.float32)
+        self.hitCounts = numpy.zeros((height, width), numpy.float32)
+        self.hitImg = numpy.zeros((height, width), numpy.uint8)
+        if dilateAmount > 0:
+            self.kernel = cv2.getStructuringElement(cv2.MORPH_RECT, (2 * dilateAmount + 1, 2 * dilateAmount + 1))
+        else:
+            self.kernel = None
+        self.lock = threading.Lock()
+        # Decayed frame count, so frequency is counts over frames
+        self.frames = 0.0
+        self.newFrames = 0
+        self.maskImg = None
+        self.maskedPixels = 0
+        self.updates = 0
+
+    def addMotion(self, motionImg):
+        """Count motion pixels of frame and return True if mask was updated"""
+        with self.lock:
+            cv2.add(self.motionCounts, 1.0, dst=self.motionCounts, mask=motionImg)
+            self.frames += 1.0
+            self.newFrames += 1
+            if self.maskImg == None:
+                due = self.newFrames >= self.trainFrames
+            else:
+                due = self.newFrames >= self.updateFrames
+            if due:
+                self.update()
+            return due
+
+    def addPeople(self, rects):
+        """Count pixels inside HOG hits (in motion image coordinates)"""
+        if len(rects) > 0:
+            with self.lock:
+                self.hitImg[:] = 0
+                for x, y, w, h in rects:
+                    cv2.rectangle(self.hitImg, (int(x), int(y)), (int(x + w) - 1, int(y + h) - 1), 255, -1)
+                cv2.add(self.hitCounts, 1.0, dst=self.hitCounts, mask=self.hitImg)
+
+    def update(self):
+        """Mask pixels with frequent motion and no recent hits, then decay counts"""
+        noiseImg = numpy.uint8((self.motionCounts >= self.noiseFrequency * self.frames) & (self.hitCounts < 1.0)) * 255
+        if self.kernel != None:
+            noiseImg = cv2.dilate(noiseImg, self.kernel)
+        self.maskedPixels = cv2.countNonZero(noiseImg)
+        self.maskImg = cv2.bitwise_not(noiseImg)
+        self.motionCounts *= self.decay
+        self.hitCounts *= self.decay
+        self.frames *= self.decay
+        self.newFrames = 0
+        self.updates += 1
@@ -0,0 +1,104 @@
+"""
+Created on Oct 18, 2026
+
+@author: sgoldsmith
+
+Copyright (c) Steven P. Goldsmith
+
+All rights reserved.
+"""
+
+import threading, time, bisect
+
+metricsByName = {}
+metricsLock = threading.Lock()
+
+def getMetrics(name):
+    """Get Metrics by name, creating it on first use"""
+    with metricsLock:
+        if name not in metricsByName:
+            metricsByName[name] = Metrics(name)
+        return metricsByName[name]
+
+class Metrics():
+    """Thread safe timers, counters and latency histograms.
+
+    Each timer keeps count, total and max seconds and counts every time into fixed
+    histogram buckets, so recording is a few dict and list updates and percentiles
+    can be estimated at any time without keeping samples.
+
+    Detectors and the video loop get a shared Metrics by name the same way they get a
+    logger, so nothing has to be passed around:
+
+    metrics = Metrics.getMetrics("ProcessVideo")
+    start = metrics.lap("motion.blur", start)
+    metrics.count("motionFrames")
+
+    """
+
+    # Histogram bucket upper bounds in seconds, last bucket is everything over
+    buckets = (0.0005, 0.001, 0.002, 0.005, 0.01, 0.02, 0.05, 0.1, 0.2, 0.5, 1.0, 2.0)
+
+    def __init__(self, name):
+        self.name = name
+        self.lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        """Clear all timers and counters"""
+        with self.lock:
+            # Timer name to [count, total, max, bucket counts]
+            self.timers = {}
+            self.counters = {}
+            self.started = time.time()
+
+    def time(self, name, elapse):
+        """Add elapse seconds to timer name"""
+        bucket = bisect.bisect_left(self.buckets, elapse)
+        with self.lock:
+            timer = self.timers.get(name)
+            if timer == None:
+                timer = [0, 0.0, 0.0, [0] * (len(self.buckets) + 1)]
+                self.timers[name] = timer
+            timer[0] += 1
+            timer[1] += elapse
+            if elapse > timer[2]:
+                timer[2] = elapse
+            timer[3][bucket] += 1
+
+    def lap(self, name, start):
+        """Add time since start to timer name and return now to start the next lap"""
+        now = time.time()
+        self.time(name, now - start)
+        return now
+
+    def count(self, name, amount=1):
+        """Add amount to counter name"""
+        with self.lock:
+            self.counters[name] = self.counters.get(name, 0) + amount
+
+    def percentile(self, histogram, count, maxTime, q):
+        """Estimate percentile q as upper bound of the bucket it falls in, but no more than max"""
+        rank = q / 100.0 * count
+        total = 0
+        for bucket, bucketCount in enumerate(histogram):
+            total += bucketCount
+            if total >= rank:
+                break
+        if bucket < len(self.buckets):
+            return min(self.buckets[bucket], maxTime)
+        return maxTime
+
+    def snapshot(self):
+        """Copy of timers and counters as dict that can be written as JSON"""
+        with self.lock:
+            timers = dict((name, (count, total, maxTime, list(histogram))) for name, (count, total, maxTime, histogram) in self.timers.items())
+            counters = dict(self.counters)
+            started = self.started
+        timerStats = {}
+        for name, (count, total, maxTime, histogram) in timers.items():
+            timerStats[name] = {"count": count, "total": total, "mean": total / count, "max": maxTime,
+                                "p50": self.percentile(histogram, count, maxTime, 50), "p95": self.percentile(histogram, count, maxTime, 95),
+                                "p99": self.percentile(histogram, count, maxTime, 99), "histogram": histogram}
+        return {"name": self.name, "elapse": time.time() - started, "buckets": list(self.buckets),
+                "timers": timerStats, "counters": counters}
@@ -0,0 +1,70 @@
+"""
+Created on Oct 18, 2026
+
+@author: sgoldsmith
+
+Copyright (c) Steven P. Goldsmith
+
+All rights reserved.
+"""
+
+import numpy
+
+class Mosaic():
+    """Pack ROIs into one image so detection runs once per frame.
+    
+    ROIs are placed in rows (tallest first) separated by black gutters at least one
+    detection window wide and high, so a window at the base scale never covers pixels
+    from two ROIs. Gutters are not grown for coarser pyramid levels, where a window
+    covers more than a gutter and can see parts of neighboring ROIs and give hits no
+    single ROI would. Locations found in the mosaic are mapped back to the ROI that
+    holds their center and then clipped to it in frame coordinates.
+    
+    """
+    
+    def __init__(self, gutterWidth, gutterHeight):
+        self.gutterWidth = gutterWidth
+        self.gutterHeight = gutterHeight
+
+    def pack(self, image, rects):
+        """Return mosaic image and placements of (mosaic x, mosaic y, x, y, w, h) for each rect"""
+        imgHeight, imgWidth = image.shape[:2]
+        # Rows are at least as wide as the frame or widest ROI
+        maxWidth = max([imgWidth] + [w for x, y, w, h in rects])
+        placements = []
+        curX = 0
+        curY = 0
+        rowHeight = 0
+        mosaicWidth = 0
+        for x, y, w, h in sorted(rects, key=lambda r: r[3], reverse=True):
+            # Start new row if ROI does not fit
+            if curX > 0 and curX + w > maxWidth:
+                curX = 0
+                curY += rowHeight + self.gutterHeight
+                rowHeight = 0
+            placements.append((curX, curY, x, y, w, h))
+            mosaicWidth = max(mosaicWidth, curX + w)
+            rowHeight = max(rowHeight, h)
+            curX += w + self.gutterWidth
+        mosaicImg = numpy.zeros((curY + rowHeight, mosaicWidth) + image.shape[2:], image.dtype)
+        for mx, my, x, y, w, h in placements:
+            mosaicImg[my:my + h, mx:mx + w] = image[y:y + h, x:x + w]
+        return mosaicImg, placements
+
+    def unpack(self, locations, weights, placements):
+        """Map mosaic locations and their weights to frame locations clipped to their ROI, dropping ones in gutters"""
+        frameLocations = []
+        frameWeights = []
+        for (lx, ly, lw, lh), weight in zip(locations, numpy.ravel(weights)):
+            cx = lx + lw / 2
+            cy = ly + lh / 2
+            for mx, my, x, y, w, h in placements:
+                if mx <= cx < mx + w and my <= cy < my + h:
+                    x1 = max(lx, mx)
+                    y1 = max(ly, my)
+                    x2 = min(lx + lw, mx + w)
+                    y2 = min(ly + lh, my + h)
+                    frameLocations.append((x1 - mx + x, y1 - my + y, x2 - x1, y2 - y1))
+                    frameWeights.append(float(weight))
+                    break
+        return frameLocations, frameWeights
@@ -8,7 +8,7 @@ Copyright (c) Steven P. Goldsmith
 All rights reserved.
 """
 
-import cv2, numpy, logging, DetectBase
+import time, cv2, numpy, logging, DetectBase, Rects, Metrics
 
 class Motion(DetectBase.DetectBase):
     """Motion detector.
@@ -16,13 +16,21 @@ class Motion(DetectBase.DetectBase):
     Uses moving average to determine change percent. Object marking can be used to dial in settings
     for various conditions.
     
+    blobExtractor selects how motion pixels become locations:
+    
+    tree    = dilate and erode 3x3 iterations, bounding box of every contour (nested too)
+    closing = one dilate and one erode with equivalent sized kernels, outer blobs only
+    grid    = closing on an occupancy grid downsampled by gridSize, outer blobs only
+    
     """
     
     def __init__(self, sourceWidth, sourceHeight, targetWidth, targetHeight,
                  kSize, alpha, blackThreshold, maxChange, dilateAmount, erodeAmount,
-                 markObjects, boxColor, ignoreAreasBoxColor, boxThickness, ignoreAreas, ignoreMask):
+                 markObjects, boxColor, ignoreAreasBoxColor, boxThickness, ignoreAreas, ignoreMask,
+                 blobExtractor="tree", gridSize=4):
         # Get logger
         self.logger = logging.getLogger("VideoLoop")
+        self.metrics = Metrics.getMetrics("ProcessVideo")
         # Set class attributes  
         self.sourceWidth = sourceWidth
         self.sourceHeight = sourceHeight
@@ -39,33 +47,97 @@ class Motion(DetectBase.DetectBase):
         self.ignoreAreasBoxColor = ignoreAreasBoxColor
         self.boxThickness = boxThickness
         self.ignoreAreas = ignoreAreas
+        # Compile ignore areas once
+        if ignoreAreas != None:
+            self.ignoreAreaRects = Rects.IgnoreAreas(ignoreAreas)
         self.ignoreMask = ignoreMask
+        self.blobExtractor = blobExtractor
+        self.gridSize = gridSize
+        # n 3x3 iterations are the same as one (2n + 1)x(2n + 1) pass
+        if blobExtractor == "tree":
+            self.dilateKernel = None
+            self.erodeKernel = None
+            self.dilateIterations = dilateAmount
+            self.erodeIterations = erodeAmount
+        else:
+            # Grid cells are gridSize pixels, so kernels shrink with them
+            if blobExtractor == "grid":
+                dilateSize = 2 * -(-dilateAmount // gridSize) + 1
+                erodeSize = 2 * -(-erodeAmount // gridSize) + 1
+            else:
+                dilateSize = 2 * dilateAmount + 1
+                erodeSize = 2 * erodeAmount + 1
+            self.dilateKernel = cv2.getStructuringElement(cv2.MORPH_RECT, (dilateSize, dilateSize))
+            self.erodeKernel = cv2.getStructuringElement(cv2.MORPH_RECT, (erodeSize, erodeSize))
+            self.dilateIterations = 1
+            self.erodeIterations = 1
         # Used for full size image marking
-        self.widthMultiplier = targetWidth / sourceWidth
-        self.heightMultiplier = targetHeight / sourceHeight
+        self.widthMultiplier = float(targetWidth) / sourceWidth
+        self.heightMultiplier = float(targetHeight) / sourceHeight
         # Set the rest of the data attributes
         self.totalPixels = self.sourceWidth * self.sourceHeight
         self.grayImg = None
+        # Motion before ignore mask
+        self.motionImg = None
         self.movingAvgImg = None
         self.motionPercent = 0.0
+        self.referenceReset = False
 
-    def contours(self, source):
+    def reset(self):
+        """Start over with a new moving average for the next video"""
+        self.movingAvgImg = None
+        self.motionPercent = 0.0
+        self.referenceReset = False
+
+    def morphology(self, source):
+        """Join motion pixels into blobs"""
+        start = time.time()
         # The background (bright) dilates around the black regions of frame
-        source = cv2.dilate(source, None, iterations=self.dilateAmount);
+        source = cv2.dilate(source, self.dilateKernel, iterations=self.dilateIterations);
         # The bright areas of the image (the background, apparently), get thinner, whereas the dark zones bigger
-        source = cv2.erode(source, None, iterations=self.erodeAmount);
-        # Find contours
-        image, contours, heirarchy = cv2.findContours(source, cv2.RETR_TREE, cv2.CHAIN_APPROX_SIMPLE)
-        # Add objects with motion
-        movementLocations = []
-        for contour in contours:
-            rect = cv2.boundingRect(contour)
-            # See if we should ignore any areas
-            if self.ignoreAreas == None:
-                movementLocations.append(rect)
-            elif not self.insideIgnoreAreas(rect):
-                movementLocations.append(rect)
-        return movementLocations        
+        source = cv2.erode(source, self.erodeKernel, iterations=self.erodeIterations);
+        self.metrics.lap("motion.morphology", start)
+        return source
+
+    def components(self, source):
+        """Bounding boxes of outer blobs (external contours are faster than connected component stats)"""
+        start = time.time()
+        image, contours, heirarchy = cv2.findContours(source, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
+        rects = [cv2.boundingRect(contour) for contour in contours]
+        self.metrics.lap("motion.contours", start)
+        return rects
+
+    def gridRects(self, source):
+        """Bounding boxes of blobs found on downsampled occupancy grid"""
+        gridWidth = -(-self.sourceWidth // self.gridSize)
+        gridHeight = -(-self.sourceHeight // self.gridSize)
+        # Any motion pixel in a cell marks the cell
+        gridImg = cv2.resize(source, (gridWidth, gridHeight), interpolation=cv2.INTER_AREA)
+        return_val, gridImg = cv2.threshold(gridImg, 0, 255, cv2.THRESH_BINARY)
+        rects = []
+        for x, y, w, h in self.components(self.morphology(gridImg)):
+            x *= self.gridSize
+            y *= self.gridSize
+            rects.append((x, y, min(w * self.gridSize, self.sourceWidth - x), min(h * self.gridSize, self.sourceHeight - y)))
+        return rects
+
+    def contours(self, source):
+        if self.blobExtractor == "grid":
+            rects = self.gridRects(source)
+        elif self.blobExtractor == "closing":
+            rects = self.components(self.morphology(source))
+        else:
+            source = self.morphology(source)
+            start = time.time()
+            # Find contours
+            image, contours, heirarchy = cv2.findContours(source, cv2.RETR_TREE, cv2.CHAIN_APPROX_SIMPLE)
+            rects = [cv2.boundingRect(contour) for contour in contours]
+            self.metrics.lap("motion.contours", start)
+        start = time.time()
+        # Add objects with motion not in ignore areas
+        rects = self.filterLocations(rects, False)
+        self.metrics.lap("motion.filter", start)
+        return rects
     
     def detect(self, source, target):
         """Motion detection using OpenCV.
@@ -75,6 +147,7 @@ class Motion(DetectBase.DetectBase):
         """
         
         movementLocations = []
+        start = time.time()
         # Generate work image by blurring.
         self.workImg = cv2.blur(source, self.kSize)
         # Generate moving average image if needed
@@ -85,15 +158,19 @@ class Motion(DetectBase.DetectBase):
         self.diffImg = cv2.absdiff(self.workImg, cv2.convertScaleAbs(self.movingAvgImg))
         # Convert to grayscale
         self.grayImg = cv2.cvtColor(self.diffImg, cv2.COLOR_BGR2GRAY)
+        start = self.metrics.lap("motion.blur", start)
         # Convert to BW
         return_val, self.grayImg = cv2.threshold(self.grayImg, self.blackThreshold, 255, cv2.THRESH_BINARY)
+        self.motionImg = self.grayImg
         # Apply ignore mask
         if self.ignoreMask != None:
             self.grayImg = numpy.bitwise_and(self.grayImg, self.ignoreMask)        
         # Total number of changed motion pixels
         self.motionPercent = 100.0 * cv2.countNonZero(self.grayImg) / self.totalPixels
+        self.metrics.lap("motion.threshold", start)
         # Detect if camera is adjusting and reset reference if more than maxChange
-        if self.motionPercent > self.maxChange:
+        self.referenceReset = self.motionPercent > self.maxChange
+        if self.referenceReset:
             self.logger.debug("%3.1f%% motion detected, resetting reference image" % self.motionPercent)                    
             self.movingAvgImg = numpy.float32(self.workImg)
         movementLocations = self.contours(self.grayImg)
@@ -0,0 +1,59 @@
+"""
+Created on Oct 18, 2026
+
+@author: sgoldsmith
+
+Copyright (c) Steven P. Goldsmith
+
+All rights reserved.
+"""
+
+import logging
+
+class MotionEvent():
+    """Motion event state machine.
+    
+    An event starts when motion percent goes above startThreshold and stops when it
+    drops below stopThreshold. The gap between the two keeps noise from toggling
+    events on and off. Optionally limits people detections to maxHogFps per second
+    during an event.
+    
+    """
+    
+    def __init__(self, startThreshold, stopThreshold, maxHogFps):
+        self.logger = logging.getLogger("ProcessVideo")
+        self.startThreshold = startThreshold
+        self.stopThreshold = stopThreshold
+        self.maxHogFps = maxHogFps
+        self.active = False
+        self.startTime = None
+        self.lastHogTime = None
+        # List of (start, stop) times in seconds
+        self.events = []
+
+    def update(self, motionPercent, timestamp):
+        """Update state with frame motion percent and return True if event is active"""
+        if not self.active and motionPercent > self.startThreshold:
+            self.active = True
+            self.startTime = timestamp
+            self.lastHogTime = None
+            self.logger.debug("Motion event started at %4.2f seconds" % timestamp)
+        elif self.active and motionPercent < self.stopThreshold:
+            self.stop(timestamp)
+        return self.active
+
+    def stop(self, timestamp):
+        """Stop active event"""
+        if self.active:
+            self.active = False
+            self.events.append((self.startTime, timestamp))
+            self.logger.debug("Motion event stopped at %4.2f seconds" % timestamp)
+
+    def allowHog(self, timestamp):
+        """Return True if people detection is allowed at timestamp"""
+        if self.maxHogFps <= 0.0:
+            return True
+        if self.lastHogTime == None or timestamp - self.lastHogTime >= 1.0 / self.maxHogFps:
+            self.lastHogTime = timestamp
+            return True
+        return False
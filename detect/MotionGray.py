@@ -0,0 +1,105 @@
+"""
+Created on Oct 18, 2026
+
+@author: sgoldsmith
+
+Copyright (c) Steven P. Goldsmith
+
+All rights reserved.
+"""
+
+import time, cv2, numpy, Motion
+
+class MotionGray(Motion.Motion):
+    """Grayscale first motion detector.
+    
+    Converts to grayscale before blurring and averaging, so a third of the pixels are
+    processed, and writes every step into buffers allocated once. Motion locations are
+    close to Motion but not the same. Blur, average and grayscale are linear, but the
+    absolute difference is not, so color changes that cancel out in gray are missed.
+    BenchmarkBlobs compares both engines frame by frame. On the bundled videos the mean
+    frame IoU of motion rectangles against Motion is 0.885 (two-guys.avi) to 0.989.
+    
+    """
+    
+    def __init__(self, sourceWidth, sourceHeight, targetWidth, targetHeight,
+                 kSize, alpha, blackThreshold, maxChange, dilateAmount, erodeAmount,
+                 markObjects, boxColor, ignoreAreasBoxColor, boxThickness, ignoreAreas, ignoreMask,
+                 blobExtractor="tree", gridSize=4):
+        Motion.Motion.__init__(self, sourceWidth, sourceHeight, targetWidth, targetHeight,
+                               kSize, alpha, blackThreshold, maxChange, dilateAmount, erodeAmount,
+                               markObjects, boxColor, ignoreAreasBoxColor, boxThickness, ignoreAreas, ignoreMask,
+                               blobExtractor, gridSize)
+        # Preallocate buffers
+        self.frameImg = numpy.empty((sourceHeight, sourceWidth), numpy.uint8)
+        self.workImg = numpy.empty((sourceHeight, sourceWidth), numpy.uint8)
+        self.movingAvgImg = numpy.empty((sourceHeight, sourceWidth), numpy.float32)
+        self.avgImg = numpy.empty((sourceHeight, sourceWidth), numpy.uint8)
+        self.diffImg = numpy.empty((sourceHeight, sourceWidth), numpy.uint8)
+        self.motionImg = numpy.empty((sourceHeight, sourceWidth), numpy.uint8)
+        self.maskedImg = numpy.empty((sourceHeight, sourceWidth), numpy.uint8)
+        self.grayImg = self.motionImg
+        self.morphImg = numpy.empty((sourceHeight, sourceWidth), numpy.uint8)
+        self.averaging = False
+
+    def reset(self):
+        """Start over with a new moving average, keeping buffers"""
+        self.averaging = False
+        self.motionPercent = 0.0
+        self.referenceReset = False
+
+    def morphology(self, source):
+        """Join motion pixels into blobs using morphology buffer"""
+        # Grid images are smaller than the buffer
+        if source.shape != self.morphImg.shape:
+            return Motion.Motion.morphology(self, source)
+        start = time.time()
+        cv2.dilate(source, self.dilateKernel, dst=self.morphImg, iterations=self.dilateIterations)
+        cv2.erode(self.morphImg, self.erodeKernel, dst=self.morphImg, iterations=self.erodeIterations)
+        self.metrics.lap("motion.morphology", start)
+        return self.morphImg
+
+    def detect(self, source, target):
+        """Motion detection using OpenCV.
+        
+        Based on moving average of grayscale image.
+        
+        """
+        
+        start = time.time()
+        cv2.cvtColor(source, cv2.COLOR_BGR2GRAY, dst=self.frameImg)
+        # Generate work image by blurring.
+        cv2.blur(self.frameImg, self.kSize, dst=self.workImg)
+        # Start moving average with first frame
+        if not self.averaging:
+            self.movingAvgImg[:] = self.workImg
+            self.averaging = True
+        # Generate moving average image
+        cv2.accumulateWeighted(self.workImg, self.movingAvgImg, self.alpha)
+        cv2.convertScaleAbs(self.movingAvgImg, dst=self.avgImg)
+        cv2.absdiff(self.workImg, self.avgImg, dst=self.diffImg)
+        start = self.metrics.lap("motion.blur", start)
+        # Convert to BW
+        cv2.threshold(self.diffImg, self.blackThreshold, 255, cv2.THRESH_BINARY, dst=self.motionImg)
+        # Apply ignore mask, keeping motion before mask
+        if self.ignoreMask != None:
+            cv2.bitwise_and(self.motionImg, self.ignoreMask, dst=self.maskedImg)
+            self.grayImg = self.maskedImg
+        else:
+            self.grayImg = self.motionImg
+        # Total number of changed motion pixels
+        self.motionPercent = 100.0 * cv2.countNonZero(self.grayImg) / self.totalPixels
+        self.metrics.lap("motion.threshold", start)
+        # Detect if camera is adjusting and reset reference if more than maxChange
+        self.referenceReset = self.motionPercent > self.maxChange
+        if self.referenceReset:
+            self.logger.debug("%3.1f%% motion detected, resetting reference image" % self.motionPercent)                    
+            self.movingAvgImg[:] = self.workImg
+        movementLocations = self.contours(self.grayImg)
+        # Mark objects (make sure to copy target image if you want to keep original image intact)
+        if self.markObjects == True:
+            self.mark(source, target, movementLocations, self.widthMultiplier, self.heightMultiplier, self.boxColor)
+            if self.ignoreAreas != None:                
+                self.mark(source, target, self.ignoreAreas, self.widthMultiplier, self.heightMultiplier, self.ignoreAreasBoxColor)
+        # Return filtered results
+        return movementLocations
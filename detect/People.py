@@ -8,7 +8,7 @@ Copyright (c) Steven P. Goldsmith
 All rights reserved.
 """
 
-import cv2, DetectBase
+import time, cv2, DetectBase, Rects, Metrics
 
 class People(DetectBase.DetectBase):
     """Histogram of Oriented Gradients object detector.
@@ -36,13 +36,68 @@ class People(DetectBase.DetectBase):
         self.ignoreAreasBoxColor = ignoreAreasBoxColor
         self.boxThickness = boxThickness
         self.ignoreAreas = ignoreAreas
+        # Compile ignore areas once
+        if ignoreAreas != None:
+            self.ignoreAreaRects = Rects.IgnoreAreas(ignoreAreas)
         # Used for full size image marking
-        self.widthMultiplier = targetWidth / sourceWidth
-        self.heightMultiplier = targetHeight / sourceHeight       
+        self.widthMultiplier = float(targetWidth) / sourceWidth
+        self.heightMultiplier = float(targetHeight) / sourceHeight       
+        # Raw locations and weights from last detect()
+        self.rawLocations = ()
+        self.rawWeights = ()
+        # Number of detectMultiScale calls
+        self.hogCalls = 0
+        self.metrics = Metrics.getMetrics("ProcessVideo")
         # Create HOG detector
         self.hog = cv2.HOGDescriptor()
         self.hog.setSVMDetector(cv2.HOGDescriptor_getDefaultPeopleDetector())
     
+    def detectMultiScale(self, source):
+        """Run HOG over source and return raw locations and weights"""
+        self.hogCalls += 1
+        start = time.time()
+        foundLocations, foundWeights = self.multiScale(source)
+        self.metrics.lap("people.hog", start)
+        self.metrics.count("hogCalls")
+        self.metrics.count("hogPixels", source.shape[0] * source.shape[1])
+        self.metrics.count("hits", len(foundLocations))
+        return foundLocations, foundWeights
+
+    def multiScale(self, source):
+        """HOGDescriptor.detectMultiScale with detector settings"""
+        return self.hog.detectMultiScale(source, hitThreshold=self.hitThreshold, winStride=self.winStride,
+                                         padding=self.padding, scale=self.scale, finalThreshold=self.finalThreshold,
+                                         useMeanshiftGrouping=self.useMeanshiftGrouping)
+
+    def close(self):
+        """Release detector resources, nothing to do for a single threaded detector"""
+        pass
+
+    def filterPeople(self, foundLocations):
+        """Filter out inside rectangles and rectangles in ignore areas"""
+        start = time.time()
+        foundLocationsFiltered = self.filterLocations(foundLocations, True)
+        self.metrics.lap("people.filter", start)
+        return foundLocationsFiltered
+
+    def markLocations(self, source, target, foundLocations, foundLocationsFiltered):
+        """Mark raw, filtered and ignore area boxes"""
+        self.mark(source, target, foundLocations, self.widthMultiplier, self.heightMultiplier, self.boxColor)
+        self.mark(source, target, foundLocationsFiltered, self.widthMultiplier, self.heightMultiplier, self.filteredBoxColor)
+        if self.ignoreAreas != None:                
+            self.mark(source, target, self.ignoreAreas, self.widthMultiplier, self.heightMultiplier, self.ignoreAreasBoxColor)
+    
+    def find(self, source):
+        """Detect and filter people without marking, return raw and filtered locations"""
+        foundLocations, foundWeights = self.detectMultiScale(source)
+        self.rawLocations = foundLocations
+        self.rawWeights = foundWeights
+        foundLocationsFiltered = []
+        # At least one person detected?
+        if len(foundLocations) > 0:
+            foundLocationsFiltered = self.filterPeople(foundLocations)
+        return foundLocations, foundLocationsFiltered
+
     def detect(self, source, target):
         """People detection using OpenCV.
         
@@ -52,29 +107,9 @@ class People(DetectBase.DetectBase):
         
         """     
       
-        foundLocations, foundWeights = self.hog.detectMultiScale(source, hitThreshold=self.hitThreshold,
-                                                                 winStride=self.winStride, padding=self.padding,
-                                                                 scale=self.scale, finalThreshold=self.finalThreshold,
-                                                                 useMeanshiftGrouping=self.useMeanshiftGrouping)
-        foundLocationsFiltered = []
-        # At least one person detected?
-        if len(foundLocations) > 0:
-            # Filter out inside rectangles
-            for ri, r in enumerate(foundLocations):
-                for qi, q in enumerate(foundLocations):
-                    if ri != qi and self.inside(r, q):
-                        break
-                else:
-                    # See if we should ignore any areas
-                    if self.ignoreAreas == None:
-                        foundLocationsFiltered.append(r)
-                    elif not self.insideIgnoreAreas(r):
-                        foundLocationsFiltered.append(r)
-            # Mark objects (make sure to copy target image if you want to keep original image intact)
-            if self.markObjects == True:
-                self.mark(source, target, foundLocations, self.widthMultiplier, self.heightMultiplier, self.boxColor)
-                self.mark(source, target, foundLocationsFiltered, self.widthMultiplier, self.heightMultiplier, self.filteredBoxColor)
-                if self.ignoreAreas != None:                
-                    self.mark(source, target, self.ignoreAreas, self.widthMultiplier, self.heightMultiplier, self.ignoreAreasBoxColor)
+        foundLocations, foundLocationsFiltered = self.find(source)
+        # Mark objects (make sure to copy target image if you want to keep original image intact)
+        if len(foundLocations) > 0 and self.markObjects == True:
+            self.markLocations(source, target, foundLocations, foundLocationsFiltered)
         # Return filtered results
         return foundLocationsFiltered
@@ -0,0 +1,61 @@
+"""
+Created on Oct 18, 2026
+
+@author: sgoldsmith
+
+Copyright (c) Steven P. Goldsmith
+
+All rights reserved.
+"""
+
+import numpy, WorkerPool
+
+class PeoplePool():
+    """Persistent pool of people detection workers.
+    
+    Each worker owns a People detector (and its preloaded HOGDescriptor) created once by
+    createPeople, so nothing is rebuilt per frame. OpenCV releases the GIL during
+    detectMultiScale, so threads run HOG on separate cores. If a worker fails, detect()
+    raises its exception.
+
+    Workers only detect. Boxes are marked by detect() on the calling thread after every
+    ROI is done, so padded ROIs that overlap never see each other's marks and results do
+    not depend on worker timing.
+    
+    """
+    
+    def __init__(self, workers, createPeople):
+        self.pool = WorkerPool.WorkerPool("people", workers, createPeople)
+        self.peoples = self.pool.states
+        # Raw locations and weights of last detect() in frame coordinates
+        self.rawLocations = []
+        self.rawWeights = []
+
+    def find(self, people, sourceRoi):
+        """Detect people in ROI on worker, return raw locations, filtered locations and raw weights"""
+        roiLocations, roiLocationsFiltered = people.find(sourceRoi)
+        return roiLocations, roiLocationsFiltered, people.rawWeights
+
+    def detect(self, rois):
+        """Detect people in list of (x, y, sourceRoi, targetRoi) and return merged frame locations"""
+        roiResults = self.pool.map(self.find, [sourceRoi for x, y, sourceRoi, targetRoi in rois])
+        # Merge in ROI order so results do not depend on worker scheduling
+        foundLocations = []
+        self.rawLocations = []
+        self.rawWeights = []
+        # Workers are configured the same, so any of them can mark
+        people = self.peoples[0]
+        for (x, y, sourceRoi, targetRoi), (roiLocations, roiLocationsFiltered, rawWeights) in zip(rois, roiResults):
+            if len(roiLocations) > 0 and people.markObjects == True:
+                people.markLocations(sourceRoi, targetRoi, roiLocations, roiLocationsFiltered)
+            # Translate ROI locations to frame locations
+            for fx, fy, fw, fh in roiLocationsFiltered:
+                foundLocations.append((fx + x, fy + y, fw, fh))
+            for (fx, fy, fw, fh), weight in zip(roiLocations, numpy.ravel(rawWeights)):
+                self.rawLocations.append((fx + x, fy + y, fw, fh))
+                self.rawWeights.append(float(weight))
+        return foundLocations
+
+    def close(self):
+        """Stop workers"""
+        self.pool.close()
@@ -0,0 +1,134 @@
+"""
+Created on Oct 18, 2026
+
+@author: sgoldsmith
+
+Copyright (c) Steven P. Goldsmith
+
+All rights reserved.
+
+Rectangle geometry on Nx4 numpy arrays of (x, y, w, h). Everything is done as
+batched numpy operations instead of Python loops over rectangle pairs.
+"""
+
+import numpy
+
+def toArray(rects):
+    """Convert list or array of (x, y, w, h) to Nx4 int32 array"""
+    return numpy.asarray(rects, dtype=numpy.int32).reshape(-1, 4)
+
+def corners(rects):
+    """Return x1, y1, x2, y2 column vectors"""
+    x1 = rects[:, 0]
+    y1 = rects[:, 1]
+    return x1, y1, x1 + rects[:, 2], y1 + rects[:, 3]
+
+def inside(r, q):
+    """NxM matrix, True where r[i] is strictly inside q[j]"""
+    rx1, ry1, rx2, ry2 = [c[:, None] for c in corners(r)]
+    qx1, qy1, qx2, qy2 = [c[None, :] for c in corners(q)]
+    return (rx1 > qx1) & (ry1 > qy1) & (rx2 < qx2) & (ry2 < qy2)
+
+def nested(rects):
+    """True where a rectangle is strictly inside any other rectangle of rects"""
+    # A rectangle is never strictly inside itself
+    return inside(rects, rects).any(axis=1)
+
+def iou(a, b):
+    """NxM matrix of intersection over union"""
+    ax1, ay1, ax2, ay2 = [c[:, None] for c in corners(a)]
+    bx1, by1, bx2, by2 = [c[None, :] for c in corners(b)]
+    w = numpy.clip(numpy.minimum(ax2, bx2) - numpy.maximum(ax1, bx1), 0, None)
+    h = numpy.clip(numpy.minimum(ay2, by2) - numpy.maximum(ay1, by1), 0, None)
+    intersection = (w * h).astype(numpy.float64)
+    union = (a[:, 2] * a[:, 3])[:, None] + (b[:, 2] * b[:, 3])[None, :] - intersection
+    return numpy.where(union > 0, intersection / numpy.maximum(union, 1), 0.0)
+
+def nms(rects, weights, threshold):
+    """Non maximum suppression, return indexes of kept rectangles (best weight first)"""
+    order = numpy.argsort(-numpy.asarray(weights, dtype=numpy.float64).reshape(-1), kind="mergesort")
+    overlaps = iou(rects, rects)
+    keep = []
+    suppressed = numpy.zeros(len(rects), dtype=bool)
+    # One pass per kept rectangle, each suppressing all of its overlaps at once
+    for i in order:
+        if not suppressed[i]:
+            keep.append(i)
+            suppressed |= overlaps[i] > threshold
+    return numpy.array(keep, dtype=numpy.intp)
+
+def similar(rects, eps):
+    """NxN matrix, True where rectangles are within eps of each other (same test as OpenCV SimilarRects)"""
+    x1, y1, x2, y2 = corners(rects)
+    w = rects[:, 2]
+    h = rects[:, 3]
+    delta = eps * (numpy.minimum(w[:, None], w[None, :]) + numpy.minimum(h[:, None], h[None, :])) * 0.5
+    return ((numpy.abs(x1[:, None] - x1[None, :]) <= delta) & (numpy.abs(y1[:, None] - y1[None, :]) <= delta) &
+            (numpy.abs(x2[:, None] - x2[None, :]) <= delta) & (numpy.abs(y2[:, None] - y2[None, :]) <= delta))
+
+def partition(similarity):
+    """Label connected components of similarity matrix, numbered in order of their first rectangle"""
+    labels = numpy.arange(len(similarity))
+    while True:
+        # Every rectangle takes lowest label of its neighbors until nothing changes
+        newLabels = numpy.where(similarity, labels[None, :], len(labels)).min(axis=1)
+        newLabels = newLabels[newLabels]
+        if (newLabels == labels).all():
+            break
+        labels = newLabels
+    roots, labels = numpy.unique(labels, return_inverse=True)
+    return labels, len(roots)
+
+def group(rects, weights, groupThreshold, eps):
+    """Group rectangles the same way as OpenCV HOGDescriptor.groupRectangles.
+
+    Clusters of more than groupThreshold similar rectangles become their average
+    rectangle with the best weight of the cluster. Averages inside another average
+    (with eps margin) of a bigger cluster are dropped. Return rectangles and weights.
+
+    """
+    rects = toArray(rects)
+    weights = numpy.asarray(weights, dtype=numpy.float64).reshape(-1)
+    if groupThreshold <= 0 or len(rects) == 0:
+        return rects, weights
+    labels, clusters = partition(similar(rects, eps))
+    counts = numpy.bincount(labels, minlength=clusters)
+    sums = numpy.zeros((clusters, 4))
+    numpy.add.at(sums, labels, rects)
+    best = numpy.full(clusters, -numpy.inf)
+    numpy.maximum.at(best, labels, weights)
+    averages = toArray(numpy.rint(sums * (1.0 / counts)[:, None]))
+    keep = counts > groupThreshold
+    rx1, ry1, rx2, ry2 = [c[:, None] for c in corners(averages)]
+    qx1, qy1, qx2, qy2 = [c[None, :] for c in corners(averages)]
+    dx = numpy.rint(averages[:, 2] * eps).astype(numpy.int32)[None, :]
+    dy = numpy.rint(averages[:, 3] * eps).astype(numpy.int32)[None, :]
+    n1 = counts[:, None]
+    n2 = counts[None, :]
+    covered = ((rx1 >= qx1 - dx) & (ry1 >= qy1 - dy) & (rx2 <= qx2 + dx) & (ry2 <= qy2 + dy) &
+               ((n2 > numpy.maximum(3, n1)) | (n1 < 3)) & keep[None, :])
+    numpy.fill_diagonal(covered, False)
+    keep &= ~covered.any(axis=1)
+    return averages[keep], best[keep]
+
+def clip(rects, weights, width, height):
+    """Clip rectangles to width x height image and drop empty ones with their weights"""
+    x1, y1, x2, y2 = corners(rects)
+    x1 = numpy.maximum(x1, 0)
+    y1 = numpy.maximum(y1, 0)
+    x2 = numpy.minimum(x2, width)
+    y2 = numpy.minimum(y2, height)
+    keep = (x2 > x1) & (y2 > y1)
+    return toArray(numpy.column_stack((x1, y1, x2 - x1, y2 - y1)))[keep], weights[keep]
+
+class IgnoreAreas():
+    """Ignore areas compiled once for fast inside tests"""
+    
+    def __init__(self, areas):
+        self.areas = toArray(areas)
+
+    def inside(self, rects):
+        """True where rectangle is strictly inside at least one ignore area"""
+        if len(rects) == 0 or len(self.areas) == 0:
+            return numpy.zeros(len(rects), dtype=bool)
+        return inside(rects, self.areas).any(axis=1)
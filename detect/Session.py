@@ -0,0 +1,631 @@
+"""
+Created on Oct 18, 2026
+
+@author: sgoldsmith
+
+Copyright (c) Steven P. Goldsmith
+
+All rights reserved.
+"""
+
+import logging, time, numpy, cv2, Metrics, Motion, MotionGray, People, TiledPeople, PeoplePool, Mosaic, MotionEvent, Tracker
+
+class FrameResult():
+    """Motion and people detection result for one frame.
+
+    source is the resized frame, which Session.process() resizes into a buffer reused
+    for the next frame. Copy source if the result is kept after the next frame is
+    processed.
+
+    """
+
+    def __init__(self, f, source, target, movementLocations, motionPercent, active):
+        self.f = f
+        self.source = source
+        self.target = target
+        self.movementLocations = movementLocations
+        self.motionPercent = motionPercent
+        # True if people detection should run (or ran) on frame
+        self.active = active
+        self.foundLocations = []
+        # Raw HOG locations before filtering and their weights
+        self.rawLocations = []
+        self.rawWeights = []
+        # Scale from source to target coordinates
+        self.widthScale = 1.0
+        self.heightScale = 1.0
+        # True if people locations are in source coordinates
+        self.peopleInSource = False
+
+class Session():
+    """Detection session configured once and reused for many videos or streams.
+
+    Motion and People detectors (with their HOGDescriptor and SVM detector) are cached by
+    image size and kept for the life of the session, as are ROI people detection workers.
+    Call start() for each video or stream, then pass frames to process() or
+    processFrames(). Call close() when done.
+
+    config is a ConfigParser or a dict returned by readConfig() (possibly changed). A
+    dict must have every option in configNames.
+
+    """
+
+    # Mode name to (useResize, useRoi, useCascade)
+    modes = {"noresize-noroi": (False, False, False),
+             "resize-noroi": (True, False, False),
+             "resize-roi": (True, True, False),
+             "resize-cascade": (True, False, True)}
+
+    # Options returned by readConfig()
+    configNames = ("resizeWidth", "resizeHeight", "kSize", "alpha", "blackThreshold", "maxChange", "startThreshold",
+                   "stopThreshold", "useSampleFps", "sampleFps", "skipFrames", "useEvents", "useGrayEngine",
+                   "dilateAmount", "erodeAmount", "blobExtractor", "gridSize", "markObjects", "boxColor",
+                   "ignoreAreasBoxColor", "boxThickness", "ignoreAreas", "ignoreMask", "maskImg", "minWidth",
+                   "minHeight", "addWidth", "addHeight", "roiWorkers", "tileWorkers", "useMosaic", "runCascade",
+                   "cascadeHitThreshold", "mergeDistance", "maxRoiFraction", "hitThreshold", "winStride", "padding",
+                   "scale", "finalThreshold", "useMeanshiftGrouping", "peopleMarkObjects", "peopleBoxColor",
+                   "filteredBoxColor", "peopleIgnoreAreasBoxColor", "peopleBoxThickness", "peopleIgnoreAreas",
+                   "playbackFps", "maxHogFps", "useTracking", "verifyFrames", "minOverlap", "maxMissed")
+
+    def __init__(self, config):
+        self.logger = logging.getLogger("ProcessVideo")
+        self.metrics = Metrics.getMetrics("ProcessVideo")
+        if not isinstance(config, dict):
+            config = Session.readConfig(config)
+        missing = [name for name in Session.configNames if name not in config]
+        if len(missing) > 0:
+            raise ValueError("Session config is missing %s" % ", ".join(missing))
+        for name, value in config.items():
+            setattr(self, name, value)
+        # Detectors cached by image size
+        self.motions = {}
+        self.peoples = {}
+        self.pools = {}
+        self.motion = None
+        self.people = None
+        self.candidatePeople = None
+        self.mosaic = None
+        self.peoplePool = None
+        self.motionEvent = None
+        self.tracker = None
+        self.sourceImg = None
+        self.rawLocations = []
+        self.rawWeights = []
+        # Pixels scanned by HOG and pixels of the images they came from
+        self.hogPixels = 0
+        self.framePixels = 0
+        self.fps = 30.0
+        self.f = 0
+
+    @staticmethod
+    def readConfig(parser):
+        """Parse video, motion, people detect and tracking options into dict of typed values"""
+        config = {}
+        # Video related
+        config["resizeWidth"] = parser.getint("video", "resizeWidth")
+        config["resizeHeight"] = parser.getint("video", "resizeHeight")
+        # Motion related
+        config["kSize"] = eval(parser.get("motion", "kSize"), {}, {})
+        config["alpha"] = parser.getfloat("motion", "alpha")
+        config["blackThreshold"] = parser.getint("motion", "blackThreshold")
+        config["maxChange"] = parser.getfloat("motion", "maxChange")
+        config["startThreshold"] = parser.getfloat("motion", "startThreshold")
+        config["stopThreshold"] = parser.getfloat("motion", "stopThreshold")
+        config["useSampleFps"] = parser.getboolean("motion", "useSampleFps")
+        config["sampleFps"] = parser.getfloat("motion", "sampleFps")
+        config["skipFrames"] = parser.getint("motion", "skipFrames")
+        config["useEvents"] = parser.getboolean("motion", "useEvents")
+        config["useGrayEngine"] = parser.getboolean("motion", "useGrayEngine")
+        config["dilateAmount"] = parser.getint("motion", "dilateAmount")
+        config["erodeAmount"] = parser.getint("motion", "erodeAmount")
+        config["blobExtractor"] = parser.get("motion", "blobExtractor")
+        config["gridSize"] = parser.getint("motion", "gridSize")
+        config["markObjects"] = parser.getboolean("motion", "markObjects")
+        config["boxColor"] = eval(parser.get("motion", "boxColor"), {}, {})
+        config["ignoreAreasBoxColor"] = eval(parser.get("motion", "ignoreAreasBoxColor"), {}, {})
+        config["boxThickness"] = parser.getint("motion", "boxThickness")
+        ignoreAreas = eval(parser.get("motion", "ignoreAreas"), {}, {})
+        if ignoreAreas == None:
+            config["ignoreAreas"] = None
+        else:
+            config["ignoreAreas"] = numpy.array(ignoreAreas, dtype=numpy.int32)
+        config["ignoreMask"] = parser.get("motion", "ignoreMask")
+        if config["ignoreMask"] != "":
+            config["maskImg"] = cv2.cvtColor(cv2.imread(config["ignoreMask"]), cv2.COLOR_BGR2GRAY)
+        else:
+            config["ignoreMask"] = None
+            config["maskImg"] = None
+        # People detect related
+        config["minWidth"] = parser.getint("peopleDetect", "minWidth")
+        config["minHeight"] = parser.getint("peopleDetect", "minHeight")
+        config["addWidth"] = parser.getint("peopleDetect", "addWidth")
+        config["addHeight"] = parser.getint("peopleDetect", "addHeight")
+        config["roiWorkers"] = parser.getint("peopleDetect", "roiWorkers")
+        config["tileWorkers"] = parser.getint("peopleDetect", "tileWorkers")
+        config["useMosaic"] = parser.getboolean("peopleDetect", "useMosaic")
+        config["runCascade"] = parser.getboolean("peopleDetect", "runCascade")
+        config["cascadeHitThreshold"] = parser.getfloat("peopleDetect", "cascadeHitThreshold")
+        config["mergeDistance"] = parser.getint("peopleDetect", "mergeDistance")
+        config["maxRoiFraction"] = parser.getfloat("peopleDetect", "maxRoiFraction")
+        config["hitThreshold"] = parser.getfloat("peopleDetect", "hitThreshold")
+        config["winStride"] = eval(parser.get("peopleDetect", "winStride"), {}, {})
+        config["padding"] = eval(parser.get("peopleDetect", "padding"), {}, {})
+        config["scale"] = parser.getfloat("peopleDetect", "scale")
+        config["finalThreshold"] = parser.getfloat("peopleDetect", "finalThreshold")
+        config["useMeanshiftGrouping"] = parser.getboolean("peopleDetect", "useMeanshiftGrouping")
+        config["peopleMarkObjects"] = parser.getboolean("peopleDetect", "markObjects")
+        config["peopleBoxColor"] = eval(parser.get("peopleDetect", "boxColor"), {}, {})
+        config["filteredBoxColor"] = eval(parser.get("peopleDetect", "filteredBoxColor"), {}, {})
+        config["peopleIgnoreAreasBoxColor"] = eval(parser.get("peopleDetect", "ignoreAreasBoxColor"), {}, {})
+        config["peopleBoxThickness"] = parser.getint("peopleDetect", "boxThickness")
+        peopleIgnoreAreas = eval(parser.get("peopleDetect", "ignoreAreas"), {}, {})
+        if peopleIgnoreAreas == None:
+            config["peopleIgnoreAreas"] = None
+        else:
+            config["peopleIgnoreAreas"] = numpy.array(peopleIgnoreAreas, dtype=numpy.int32)
+        config["playbackFps"] = parser.getfloat("peopleDetect", "playbackFps")
+        config["maxHogFps"] = parser.getfloat("peopleDetect", "maxHogFps")
+        # Tracking related
+        config["useTracking"] = parser.getboolean("tracking", "useTracking")
+        config["verifyFrames"] = parser.getint("tracking", "verifyFrames")
+        config["minOverlap"] = parser.getfloat("tracking", "minOverlap")
+        config["maxMissed"] = parser.getint("tracking", "maxMissed")
+        return config
+
+    @staticmethod
+    def modeName(useResize, useRoi, useCascade):
+        """Name of mode used in file names and reports"""
+        if useResize:
+            name = "resize-"
+        else:
+            name = "noresize-"
+        if useCascade:
+            name += "cascade"
+        elif useRoi:
+            name += "roi"
+        else:
+            name += "noroi"
+        return name
+
+    def mergeRects(self, rects, distance):
+        """Merge rectangles that overlap or are within distance of each other until none do.
+
+        Two rectangles are only merged if their bounding box is no bigger than both of
+        them, so merging never adds pixels to scan.
+
+        """
+        merged = list(rects)
+        i = 0
+        while i < len(merged):
+            x1, y1, w1, h1 = merged[i]
+            for j in xrange(i + 1, len(merged)):
+                x2, y2, w2, h2 = merged[j]
+                x = min(x1, x2)
+                y = min(y1, y2)
+                w = max(x1 + w1, x2 + w2) - x
+                h = max(y1 + h1, y2 + h2) - y
+                if (x1 - distance <= x2 + w2 and x2 - distance <= x1 + w1 and y1 - distance <= y2 + h2 and y2 - distance <= y1 + h1 and
+                        w * h <= w1 * h1 + w2 * h2):
+                    merged[i] = [x, y, w, h]
+                    del merged[j]
+                    # Grown rectangle may now reach ones already checked
+                    i = 0
+                    break
+            else:
+                i += 1
+        return merged
+
+    def bigEnough(self, w, h):
+        """True if motion location is big enough for ROI people detection"""
+        return w > self.minWidth and h > self.minHeight
+
+    def padRects(self, image, rects, useFilter):
+        """Pad and merge rectangles, get image dimensions, ROI composite image size for display and total ROI pixels"""
+        imgHeight, imgWidth, imgUnknown = image.shape
+        winWidth = 0
+        winHeight = 0
+        roiPixels = 0
+        paddedRects = []
+        # Get consolidated image width and height from rects
+        for x, y, w, h in rects:
+            # Filter based on size if True
+            if (not useFilter) or self.bigEnough(w, h):
+                y1 = y - self.addHeight
+                if y1 < 0:
+                    y1 = 0
+                y2 = y + h + self.addHeight
+                if y2 > imgHeight:
+                    y2 = imgHeight
+                x1 = x - self.addWidth
+                if x1 < 0:
+                    x1 = 0
+                x2 = x + w + self.addWidth
+                if x2 > imgWidth:
+                    x2 = imgWidth
+                paddedRects.append([x1, y1, x2 - x1, y2 - y1])
+            else:
+                self.logger.debug("Width must be %d and height must be %d: w = %d, h = %d" % (self.minWidth, self.minHeight, w, h))
+        # Merge padded rectangles that overlap or are close when it scans fewer pixels
+        if self.mergeDistance >= 0:
+            paddedRects = self.mergeRects(paddedRects, self.mergeDistance)
+        for x, y, w, h in paddedRects:
+            winWidth += w
+            winHeight = max(winHeight, h)
+            roiPixels += w * h
+        return paddedRects, imgHeight, imgWidth, winHeight, winWidth, roiPixels
+
+    def detectPeopleRoi(self, source, target, rects):
+        """Do people detection on ROIs"""
+        paddedRects, imgHeight, imgWidth, winHeight, winWidth, roiPixels = self.padRects(source, rects, True)
+        sourcePixels = imgHeight * imgWidth
+        # Full frame detection is cheaper when ROIs cover most of the frame
+        if roiPixels > self.maxRoiFraction * sourcePixels:
+            self.logger.debug("ROI pixels %d > %3.2f of frame, using full frame" % (roiPixels, self.maxRoiFraction))
+            return self.detectPeople(source, target)
+        if self.useMosaic:
+            return self.detectPeopleMosaic(source, target, paddedRects)
+        self.hogPixels += roiPixels
+        self.framePixels += sourcePixels
+        self.metrics.count("rois", len(paddedRects))
+        rois = []
+        for x, y, w, h in paddedRects:
+            self.logger.debug("detectPeopleRoi %d %d %d %d" % (x, y, w, h))
+            sourceRoi = source[y:y + h, x:x + w]
+            targetRoi = target[int(y * self.heightScale):int((y + h) * self.heightScale), int(x * self.widthScale):int((x + w) * self.widthScale)]
+            rois.append((x, y, sourceRoi, targetRoi))
+        if self.peoplePool != None:
+            foundLocations = self.peoplePool.detect(rois)
+            self.rawLocations.extend(self.peoplePool.rawLocations)
+            self.rawWeights.extend(self.peoplePool.rawWeights)
+        else:
+            foundLocations = []
+            roiResults = []
+            for x, y, sourceRoi, targetRoi in rois:
+                roiLocations, roiLocationsFiltered = self.people.find(sourceRoi)
+                roiResults.append((roiLocations, roiLocationsFiltered))
+                # Translate ROI locations to frame locations
+                for fx, fy, fw, fh in roiLocationsFiltered:
+                    foundLocations.append((fx + x, fy + y, fw, fh))
+                self.addRaw(x, y)
+            # Mark after every ROI is detected, so overlapping ROIs never scan marks
+            if self.people.markObjects == True:
+                for (x, y, sourceRoi, targetRoi), (roiLocations, roiLocationsFiltered) in zip(rois, roiResults):
+                    if len(roiLocations) > 0:
+                        self.people.markLocations(sourceRoi, targetRoi, roiLocations, roiLocationsFiltered)
+        if len(foundLocations) > 0:
+            self.logger.debug("Detected people locations: %s" % (foundLocations))
+        return foundLocations
+
+    def detectPeopleMosaic(self, source, target, paddedRects):
+        """Do people detection once on all ROIs packed into a mosaic"""
+        foundLocationsFiltered = []
+        if len(paddedRects) > 0:
+            mosaicImg, placements = self.mosaic.pack(source, paddedRects)
+            mosaicPixels = mosaicImg.shape[0] * mosaicImg.shape[1]
+            sourcePixels = source.shape[0] * source.shape[1]
+            # Gutters and row ends can make the mosaic bigger than the ROIs or even the frame
+            if mosaicPixels > self.maxRoiFraction * sourcePixels:
+                self.logger.debug("Mosaic pixels %d > %3.2f of frame, using full frame" % (mosaicPixels, self.maxRoiFraction))
+                return self.detectPeople(source, target)
+            self.metrics.count("rois", len(paddedRects))
+            # Gutters are scanned too
+            self.hogPixels += mosaicPixels
+            self.framePixels += sourcePixels
+            foundLocations, foundWeights = self.people.detectMultiScale(mosaicImg)
+            # Map mosaic locations back to frame locations
+            foundLocations, foundWeights = self.mosaic.unpack(foundLocations, foundWeights, placements)
+            self.rawLocations.extend(foundLocations)
+            self.rawWeights.extend(foundWeights)
+            if len(foundLocations) > 0:
+                foundLocationsFiltered = self.people.filterPeople(foundLocations)
+                if self.peopleMarkObjects:
+                    self.people.markLocations(source, target, foundLocations, foundLocationsFiltered)
+                self.logger.debug("Detected people locations: %s" % (foundLocationsFiltered))
+        return foundLocationsFiltered
+
+    def detectPeopleCascade(self, source, target):
+        """Do people detection on full size crops of candidates found in resized image.
+
+        Candidates are scaled with float scale factors, so sizes that do not divide
+        evenly (349x240) map correctly. Returns locations in target coordinates. Pixels
+        scanned by both stages are counted against the full size frame.
+
+        """
+        candidates, weights = self.candidatePeople.detectMultiScale(source)
+        self.hogPixels += source.shape[0] * source.shape[1]
+        imgHeight, imgWidth = target.shape[:2]
+        winWidth, winHeight = self.people.hog.winSize
+        cropRects = []
+        for x, y, w, h in self.scaleRects(candidates, self.widthScale, self.heightScale):
+            # Pad and make sure crop holds at least one detection window
+            padWidth = max(int(self.addWidth * self.widthScale), (winWidth - w) / 2 + 1)
+            padHeight = max(int(self.addHeight * self.heightScale), (winHeight - h) / 2 + 1)
+            x1 = max(x - padWidth, 0)
+            y1 = max(y - padHeight, 0)
+            x2 = min(x + w + padWidth, imgWidth)
+            y2 = min(y + h + padHeight, imgHeight)
+            cropRects.append([x1, y1, x2 - x1, y2 - y1])
+        foundLocations = []
+        self.framePixels += imgWidth * imgHeight
+        # Overlapping crops are merged when that scans fewer pixels
+        for x, y, w, h in self.mergeRects(cropRects, 0):
+            self.hogPixels += w * h
+            crop = target[y:y + h, x:x + w]
+            for fx, fy, fw, fh in self.people.detect(crop, crop):
+                foundLocations.append((fx + x, fy + y, fw, fh))
+            self.addRaw(x, y)
+        if len(foundLocations) > 0:
+            self.logger.debug("Detected people locations: %s, candidates: %d" % (foundLocations, len(candidates)))
+        return foundLocations
+
+    def detectPeople(self, source, target):
+        """Do people detection on full image"""
+        foundLocations = self.people.detect(source, target)
+        self.addRaw(0, 0)
+        self.hogPixels += source.shape[0] * source.shape[1]
+        self.framePixels += source.shape[0] * source.shape[1]
+        if len(foundLocations) > 0:
+            self.logger.debug("Detected people locations: %s" % (foundLocations))
+        return foundLocations
+
+    def addRaw(self, x, y):
+        """Keep raw locations and weights of last people detection translated by x, y"""
+        for (fx, fy, fw, fh), weight in zip(self.people.rawLocations, numpy.ravel(self.people.rawWeights)):
+            self.rawLocations.append((fx + x, fy + y, fw, fh))
+            self.rawWeights.append(float(weight))
+
+    def createPeople(self, peopleWidth, peopleHeight, imgWidth, imgHeight, hitThreshold, markObjects, scale, tileWorkers=0):
+        """Create people detector, HOG runs on tiles with tileWorkers threads if more than 0"""
+        args = (peopleWidth, peopleHeight, imgWidth, imgHeight,
+                hitThreshold, self.winStride, self.padding, scale, self.finalThreshold, self.useMeanshiftGrouping,
+                markObjects, self.peopleBoxColor, self.filteredBoxColor, self.peopleIgnoreAreasBoxColor,
+                self.peopleBoxThickness, self.peopleIgnoreAreas)
+        if tileWorkers > 0:
+            return TiledPeople.TiledPeople(tileWorkers, *args)
+        return People.People(*args)
+
+    def getPeople(self, peopleWidth, peopleHeight, imgWidth, imgHeight, hitThreshold, markObjects, scale):
+        """Get cached people detector or create one, tiled if it detects full size frames or crops"""
+        key = (peopleWidth, peopleHeight, imgWidth, imgHeight, hitThreshold, markObjects, scale)
+        if key not in self.peoples:
+            if (peopleWidth, peopleHeight) == (imgWidth, imgHeight) and self.tileWorkers > 0:
+                self.logger.info("Using %d tiled HOG workers for %dx%d people detection" % (self.tileWorkers, imgWidth, imgHeight))
+                tileWorkers = self.tileWorkers
+            else:
+                tileWorkers = 0
+            self.peoples[key] = self.createPeople(peopleWidth, peopleHeight, imgWidth, imgHeight, hitThreshold, markObjects, scale, tileWorkers)
+        return self.peoples[key]
+
+    def getMotion(self, imgWidth, imgHeight):
+        """Get cached motion detector reset for a new video or create one"""
+        key = (imgWidth, imgHeight)
+        if key in self.motions:
+            self.motions[key].reset()
+        else:
+            if self.useGrayEngine:
+                motionClass = MotionGray.MotionGray
+            else:
+                motionClass = Motion.Motion
+            self.motions[key] = motionClass(self.resizeWidth, self.resizeHeight, imgWidth, imgHeight,
+                                            self.kSize, self.alpha, self.blackThreshold, self.maxChange, self.dilateAmount, self.erodeAmount,
+                                            self.markObjects, self.boxColor, self.ignoreAreasBoxColor, self.boxThickness,
+                                            self.ignoreAreas, self.maskImg, self.blobExtractor, self.gridSize)
+        return self.motions[key]
+
+    def setMask(self, maskImg):
+        """Use ignore mask (resize size, black is ignored) on motion detectors from now on"""
+        self.maskImg = maskImg
+        for motion in self.motions.values():
+            motion.ignoreMask = maskImg
+
+    def getPool(self, peopleWidth, peopleHeight, imgWidth, imgHeight, scale):
+        """Get running ROI people detection workers or start them"""
+        key = (peopleWidth, peopleHeight, imgWidth, imgHeight, scale)
+        if key not in self.pools:
+            self.logger.info("Using %d ROI people detection workers" % self.roiWorkers)
+            self.pools[key] = PeoplePool.PeoplePool(self.roiWorkers,
+                                                    lambda: self.createPeople(peopleWidth, peopleHeight, imgWidth, imgHeight,
+                                                                              self.hitThreshold, self.peopleMarkObjects, scale))
+        return self.pools[key]
+
+    def start(self, imgWidth, imgHeight, useResize, useRoi, useCascade, fps=30.0):
+        """Select detectors for frame size and mode, reset per video state and return motion detector"""
+        self.imgWidth = imgWidth
+        self.imgHeight = imgHeight
+        self.fps = fps
+        self.f = 0
+        self.hogPixels = 0
+        self.framePixels = 0
+        self.motion = self.getMotion(imgWidth, imgHeight)
+        self.select(useResize, useRoi, useCascade, self.scale)
+        if self.useEvents:
+            self.motionEvent = MotionEvent.MotionEvent(self.startThreshold, self.stopThreshold, self.maxHogFps)
+        else:
+            self.motionEvent = None
+        # Resized frame is reused by process() since it only lives for one frame
+        self.sourceImg = numpy.empty((self.resizeHeight, self.resizeWidth, 3), numpy.uint8)
+        # Used to convert between source and target coordinates and for full size image marking
+        self.widthScale = float(imgWidth) / self.resizeWidth
+        self.heightScale = float(imgHeight) / self.resizeHeight
+        return self.motion
+
+    def select(self, useResize, useRoi, useCascade, scale):
+        """Select people detectors for mode and HOG scale step.
+
+        Can be called between frames to change mode. Tracks are dropped since they are
+        kept in mode dependent coordinates.
+
+        """
+        imgWidth = self.imgWidth
+        imgHeight = self.imgHeight
+        self.useResize = useResize
+        self.useRoi = useRoi
+        self.useCascade = useCascade
+        if useResize and not useCascade:
+            peopleWidth = self.resizeWidth
+            peopleHeight = self.resizeHeight
+        else:
+            peopleWidth = imgWidth
+            peopleHeight = imgHeight
+        self.people = self.getPeople(peopleWidth, peopleHeight, imgWidth, imgHeight, self.hitThreshold, self.peopleMarkObjects, scale)
+        # Cascade finds candidates on resized image with permissive hit threshold
+        if useCascade:
+            self.candidatePeople = self.getPeople(self.resizeWidth, self.resizeHeight, imgWidth, imgHeight, self.cascadeHitThreshold, False, scale)
+        else:
+            self.candidatePeople = None
+        # Gutters at least one HOG window wide and high
+        winWidth, winHeight = self.people.hog.winSize
+        self.mosaic = Mosaic.Mosaic(winWidth, winHeight)
+        # Workers keep their own HOG detector for the whole session
+        if useResize and useRoi and not self.useMosaic and self.roiWorkers > 0:
+            self.peoplePool = self.getPool(peopleWidth, peopleHeight, imgWidth, imgHeight, scale)
+        else:
+            self.peoplePool = None
+        if self.useTracking:
+            self.tracker = Tracker.Tracker(self.verifyFrames, self.minOverlap, self.maxMissed)
+        else:
+            self.tracker = None
+
+    def checkMotion(self, f, movementLocations):
+        """Return True if people detection should run on frame.
+
+        Without motion events any motion location triggers detection. With motion events
+        detection only runs while an event is active and within maxHogFps.
+
+        """
+        if self.motionEvent == None:
+            return len(movementLocations) > 0
+        timestamp = f / self.fps
+        active = self.motionEvent.update(self.motion.motionPercent, timestamp)
+        return active and len(movementLocations) > 0 and self.motionEvent.allowHog(timestamp)
+
+    def scaleRects(self, rects, widthScale, heightScale):
+        """Scale rectangles between source and target coordinates"""
+        return [(int(x * widthScale), int(y * heightScale), int(w * widthScale), int(h * heightScale)) for x, y, w, h in rects]
+
+    def detectFrame(self, f, source, target, movementLocations):
+        """Do people detection on frame with motion using selected mode"""
+        if self.tracker == None:
+            return self.detectMode(source, target, movementLocations)
+        # Only motion not covered by a live track goes to people detection
+        detectLocations = self.tracker.split(f, movementLocations)
+        foundLocations = []
+        if len(detectLocations) > 0:
+            foundLocations = self.detectMode(source, target, detectLocations)
+        # ROIs too small to scan were never checked by HOG, so their tracks are kept
+        if self.useRoi and not self.useCascade:
+            detectLocations = [(x, y, w, h) for x, y, w, h in detectLocations if self.bigEnough(w, h)]
+        # Tracker works in source coordinates
+        if self.useResize and not self.useCascade:
+            self.tracker.update(f, foundLocations, detectLocations)
+            trackedLocations = self.tracker.locations(f)
+            if self.peopleMarkObjects:
+                self.people.mark(source, target, trackedLocations, self.widthScale, self.heightScale, self.filteredBoxColor)
+        else:
+            self.tracker.update(f, self.scaleRects(foundLocations, 1.0 / self.widthScale, 1.0 / self.heightScale), detectLocations)
+            trackedLocations = self.scaleRects(self.tracker.locations(f), self.widthScale, self.heightScale)
+            if self.peopleMarkObjects:
+                self.people.mark(target, target, trackedLocations, 1, 1, self.filteredBoxColor)
+        if len(trackedLocations) > 0:
+            self.logger.debug("Tracked people locations: %s" % (trackedLocations))
+        return list(foundLocations) + trackedLocations
+
+    def detectMode(self, source, target, movementLocations):
+        """Do people detection using selected mode"""
+        if self.useCascade:
+            foundLocations = self.detectPeopleCascade(source, target)
+        elif self.useResize:
+            if self.useRoi:
+                foundLocations = self.detectPeopleRoi(source, target, movementLocations)
+            else:
+                foundLocations = self.detectPeople(source, target)
+        else:
+            foundLocations = self.detectPeople(target, target)
+        return foundLocations
+
+    def detectMotion(self, f, target, source=None):
+        """Do motion detection on frame and decide if people detection should run.
+
+        source is the resized frame. If None target is resized into a buffer reused on
+        the next call. Returns FrameResult.
+
+        """
+        if source == None:
+            start = time.time()
+            source = cv2.resize(target, (self.resizeWidth, self.resizeHeight), dst=self.sourceImg, interpolation=cv2.INTER_NEAREST)
+            self.metrics.lap("video.resize", start)
+        movementLocations = self.motion.detect(source, target)
+        active = self.checkMotion(f, movementLocations)
+        self.metrics.count("frames")
+        if active:
+            self.metrics.count("motionFrames")
+            self.logger.debug("%3.2f%% motion detected on frame %d, locations: %s" % (self.motion.motionPercent, f, movementLocations))
+        result = FrameResult(f, source, target, movementLocations, self.motion.motionPercent, active)
+        result.widthScale = self.widthScale
+        result.heightScale = self.heightScale
+        return result
+
+    def detectPeopleFrame(self, result):
+        """Do people detection on FrameResult from detectMotion if active"""
+        if result.active:
+            self.rawLocations = []
+            self.rawWeights = []
+            result.foundLocations = self.detectFrame(result.f, result.source, result.target, result.movementLocations)
+            result.rawLocations = self.rawLocations
+            result.rawWeights = self.rawWeights
+            result.peopleInSource = self.useResize and not self.useCascade
+            self.metrics.count("people", len(result.foundLocations))
+            if len(result.foundLocations) > 0:
+                self.logger.debug("People detected on frame %d, locations: %s" % (result.f, result.foundLocations))
+        return result
+
+    def process(self, target, f=None):
+        """Do motion and people detection on one frame and return FrameResult.
+
+        Frames are numbered from the last start() unless f is passed (when frames are
+        skipped). start() must be called before the first frame.
+
+        """
+        if f == None:
+            f = self.f
+        self.f = f + 1
+        start = time.time()
+        result = self.detectPeopleFrame(self.detectMotion(f, target))
+        self.metrics.lap("frame", start)
+        return result
+
+    def processFrames(self, frames):
+        """Generate FrameResult for each frame from an iterator of frames.
+
+        Each result's source is overwritten by the next frame, so use results as they
+        are generated or copy source to keep them.
+
+        """
+        for target in frames:
+            yield self.process(target)
+
+    def hogCalls(self):
+        """Total HOG detectMultiScale calls of all detectors and workers"""
+        calls = sum(people.hogCalls for people in self.peoples.values())
+        for pool in self.pools.values():
+            calls += sum(people.hogCalls for people in pool.peoples)
+        return calls
+
+    def stop(self, frames):
+        """Stop open motion event at end of video and log all events"""
+        if self.motionEvent != None:
+            self.motionEvent.stop(frames / self.fps)
+            self.logger.info("%d motion events" % len(self.motionEvent.events))
+            for startTime, stopTime in self.motionEvent.events:
+                self.logger.info("Motion event from %4.2f to %4.2f seconds" % (startTime, stopTime))
+
+    def close(self):
+        """Stop ROI and tiled HOG workers and drop cached detectors"""
+        for pool in self.pools.values():
+            pool.close()
+        for people in self.peoples.values():
+            people.close()
+        self.pools = {}
+        self.peoplePool = None
+        self.motions = {}
+        self.peoples = {}
@@ -0,0 +1,155 @@
+"""
+Created on Oct 18, 2026
+
+@author: sgoldsmith
+
+Copyright (c) Steven P. Goldsmith
+
+All rights reserved.
+"""
+
+import logging, fractions, numpy, cv2, People, Rects, WorkerPool
+
+class TiledPeople(People.People):
+    """People detector that runs full resolution HOG on tiles with worker threads.
+
+    Does what HOGDescriptor.detectMultiScale does, but each pyramid level is split into
+    overlapping column tiles that workers run HOGDescriptor.detect on in parallel.
+    OpenCV releases the GIL during detect, so tiles run on separate cores.
+
+    HOG padding is added once per level by reflecting the level image the same way
+    HOGDescriptor does, so tiles are detected without padding. Every window position
+    belongs to exactly one tile and tiles overlap by a window plus one stride on each
+    side, so every window sees the same pixels and gradients as untiled and hits are
+    identical. Hits are put back in untiled order, grouped like groupRectangles and
+    clipped to the image, so results match detectMultiScale.
+
+    Levels get more tiles the more HOG work they have, but a tile always owns at least
+    a window width of positions so overlap never more than doubles a level's work.
+    Meanshift grouping is not supported and falls back to detectMultiScale. If a tile
+    fails, its exception is raised.
+
+    """
+
+    # Aim for this many tasks per worker per frame, so workers finish together
+    tasksPerWorker = 4
+    # Same as HOGDescriptor.detectMultiScale
+    maxLevels = 64
+    groupEps = 0.2
+
+    def __init__(self, workers, *args):
+        People.People.__init__(self, *args)
+        self.logger = logging.getLogger("ProcessVideo")
+        self.workers = workers
+        self.winWidth, self.winHeight = self.hog.winSize
+        blockStrideX, blockStrideY = self.hog.blockStride
+        self.strideX, self.strideY = self.winStride
+        # HOG aligns padding to the stride it caches blocks at
+        cacheStrideX = fractions.gcd(self.strideX, blockStrideX)
+        cacheStrideY = fractions.gcd(self.strideY, blockStrideY)
+        self.padX = (self.padding[0] + cacheStrideX - 1) // cacheStrideX * cacheStrideX
+        self.padY = (self.padding[1] + cacheStrideY - 1) // cacheStrideY * cacheStrideY
+        # Level and tile layout by image size
+        self.layouts = {}
+        self.pool = WorkerPool.WorkerPool("tile", workers)
+
+    def layout(self, width, height):
+        """List of (scale, level size, scaled window size, windows down, tiles) for image size.
+
+        Each tile is (x1, x2, first window, last window + 1) in padded level coordinates,
+        with window column k at x (k + 1) * strideX.
+
+        """
+        levels = []
+        scale = 1.0
+        for i in xrange(self.maxLevels):
+            levels.append(scale)
+            if int(numpy.rint(width / scale)) < self.winWidth or int(numpy.rint(height / scale)) < self.winHeight or self.scale <= 1.0:
+                break
+            scale *= self.scale
+        # Last scale is too small, unless it is the only one
+        levels = levels[:max(i, 1)]
+        sizes = []
+        for scale in levels:
+            levelWidth = int(numpy.rint(width / scale))
+            levelHeight = int(numpy.rint(height / scale))
+            windowsAcross = max((levelWidth + 2 * self.padX - self.winWidth) // self.strideX + 1, 0)
+            windowsDown = max((levelHeight + 2 * self.padY - self.winHeight) // self.strideY + 1, 0)
+            sizes.append((scale, levelWidth, levelHeight, windowsAcross, windowsDown))
+        totalWindows = sum(across * down for scale, levelWidth, levelHeight, across, down in sizes)
+        targetWindows = max(totalWindows / float(self.workers * self.tasksPerWorker), 1.0)
+        minAcross = max(self.winWidth // self.strideX, 1)
+        layout = []
+        for scale, levelWidth, levelHeight, across, down in sizes:
+            columns = max(min(int(round(across * down / targetWindows)), across // minAcross), 1)
+            paddedWidth = levelWidth + 2 * (self.padX + self.strideX)
+            tiles = []
+            for column in xrange(columns):
+                first = across * column // columns
+                last = across * (column + 1) // columns
+                if last > first:
+                    # One stride before first window and after last window keeps gradients exact
+                    tiles.append((first * self.strideX, min((last + 1) * self.strideX + self.winWidth, paddedWidth), first, last))
+            scaledWindow = (int(numpy.rint(self.winWidth * scale)), int(numpy.rint(self.winHeight * scale)))
+            layout.append((scale, (levelWidth, levelHeight), scaledWindow, down, tiles))
+        self.logger.debug("Tiled HOG layout for %dx%d: %d levels, %d tiles" % (width, height, len(layout), sum(len(level[4]) for level in layout)))
+        return layout
+
+    def detectTile(self, state, task):
+        """Detect one tile on worker, return rows of (level, window row, window column, weight)"""
+        level, paddedImg, x1, x2, first, last, windowsDown = task
+        points, weights = self.hog.detect(paddedImg[:, x1:x2], self.hitThreshold, self.winStride, (0, 0))
+        if len(points) == 0:
+            return numpy.empty((0, 4))
+        points = numpy.asarray(points).reshape(-1, 2)
+        # Window indexes in level, keep windows this tile owns
+        columns = (points[:, 0] + x1) // self.strideX - 1
+        rows = points[:, 1] // self.strideY - 1
+        keep = (columns >= first) & (columns < last) & (rows >= 0) & (rows < windowsDown)
+        return numpy.column_stack((numpy.full(keep.sum(), level), rows[keep], columns[keep], numpy.ravel(weights)[keep]))
+
+    def tiles(self, source, layout):
+        """Generate tile tasks, making each level when its tiles are reached"""
+        height, width = source.shape[:2]
+        for level, (scale, levelSize, scaledWindow, down, tiles) in enumerate(layout):
+            if levelSize == (width, height):
+                levelImg = source
+            else:
+                levelImg = cv2.resize(source, levelSize, interpolation=cv2.INTER_LINEAR_EXACT)
+            borderX = self.padX + self.strideX
+            borderY = self.padY + self.strideY
+            paddedImg = cv2.copyMakeBorder(levelImg, borderY, borderY, borderX, borderX, cv2.BORDER_REFLECT_101)
+            for x1, x2, first, last in tiles:
+                yield (level, paddedImg, x1, x2, first, last, down)
+
+    def multiScale(self, source):
+        """Tiled HOGDescriptor.detectMultiScale"""
+        if self.useMeanshiftGrouping:
+            return People.People.multiScale(self, source)
+        height, width = source.shape[:2]
+        key = (width, height)
+        if key not in self.layouts:
+            self.layouts[key] = self.layout(width, height)
+        layout = self.layouts[key]
+        # Levels are made while workers detect tiles of levels already made
+        tileHits = self.pool.map(self.detectTile, self.tiles(source, layout))
+        hits = numpy.concatenate([numpy.empty((0, 4))] + tileHits)
+        if len(hits) == 0:
+            return (), ()
+        # Untiled order (level, then row, then column) so results do not depend on worker scheduling
+        hits = hits[numpy.lexsort((hits[:, 2], hits[:, 1], hits[:, 0]))]
+        levels = hits[:, 0].astype(numpy.intp)
+        scales = numpy.array([level[0] for level in layout])[levels]
+        scaledWindows = numpy.array([level[2] for level in layout])[levels]
+        x = numpy.rint((hits[:, 2] * self.strideX - self.padX) * scales)
+        y = numpy.rint((hits[:, 1] * self.strideY - self.padY) * scales)
+        rects = Rects.toArray(numpy.column_stack((x, y, scaledWindows)))
+        rects, weights = Rects.group(rects, hits[:, 3], int(self.finalThreshold), self.groupEps)
+        rects, weights = Rects.clip(rects, weights, width, height)
+        if len(rects) == 0:
+            return (), ()
+        return rects, weights.reshape(-1, 1)
+
+    def close(self):
+        """Stop workers"""
+        self.pool.close()
@@ -0,0 +1,107 @@
+"""
+Created on Oct 18, 2026
+
+@author: sgoldsmith
+
+Copyright (c) Steven P. Goldsmith
+
+All rights reserved.
+"""
+
+import logging
+
+class Track():
+    """Person location carried forward between frames"""
+    
+    def __init__(self, rect, f):
+        self.rect = tuple(rect)
+        self.verified = f
+        self.missed = 0
+        self.motionRect = None
+
+class Tracker():
+    """Tracks people found by HOG using motion locations.
+    
+    A motion location that covers a live track moves the track along with it instead of
+    running HOG again. Motion locations not covering a track, or covering a track not
+    verified for verifyFrames frames, still go to people detection. Tracks without
+    motion for more than maxMissed frames are dropped. All rectangles are (x, y, w, h)
+    in source image coordinates.
+    
+    """
+    
+    def __init__(self, verifyFrames, minOverlap, maxMissed):
+        self.logger = logging.getLogger("ProcessVideo")
+        self.verifyFrames = verifyFrames
+        self.minOverlap = minOverlap
+        self.maxMissed = maxMissed
+        self.tracks = []
+
+    def overlap(self, r, q):
+        """Fraction of r covered by q"""
+        rx, ry, rw, rh = r
+        qx, qy, qw, qh = q
+        w = min(rx + rw, qx + qw) - max(rx, qx)
+        h = min(ry + rh, qy + qh) - max(ry, qy)
+        if w <= 0 or h <= 0 or rw * rh == 0:
+            return 0.0
+        return float(w * h) / (rw * rh)
+
+    def split(self, f, movementLocations):
+        """Move tracks with motion and return motion locations that still need people detection"""
+        detectLocations = []
+        # Best covering motion location of each track and its overlap
+        best = {}
+        for rect in movementLocations:
+            covered = False
+            needsVerify = False
+            for track in self.tracks:
+                overlap = self.overlap(track.rect, rect)
+                if overlap >= self.minOverlap:
+                    covered = True
+                    if track not in best or overlap > best[track][0]:
+                        best[track] = (overlap, rect)
+                    if f - track.verified >= self.verifyFrames:
+                        needsVerify = True
+            if not covered or needsVerify:
+                detectLocations.append(rect)
+        # Each track moves once, with the motion location covering it most
+        for track, (overlap, rect) in best.items():
+            # Follow motion location center
+            if track.motionRect != None:
+                mx, my, mw, mh = track.motionRect
+                x, y, w, h = track.rect
+                track.rect = (x + (rect[0] + rect[2] / 2) - (mx + mw / 2), y + (rect[1] + rect[3] / 2) - (my + mh / 2), w, h)
+            track.motionRect = tuple(rect)
+        # Age tracks without motion
+        for track in self.tracks:
+            if track in best:
+                track.missed = 0
+            else:
+                track.missed += 1
+        self.tracks = [track for track in self.tracks if track.missed <= self.maxMissed]
+        return detectLocations
+
+    def update(self, f, foundLocations, detectLocations):
+        """Verify or add tracks from people found in detectLocations.
+
+        detectLocations must only hold locations HOG scanned, a track is dropped when
+        one of them covers it and no person was found.
+
+        """
+        for rect in foundLocations:
+            for track in self.tracks:
+                if self.overlap(track.rect, rect) >= self.minOverlap or self.overlap(rect, track.rect) >= self.minOverlap:
+                    track.rect = tuple(rect)
+                    track.verified = f
+                    break
+            else:
+                self.tracks.append(Track(rect, f))
+        # Tracks re-checked by HOG with no person are dropped
+        for rect in detectLocations:
+            self.tracks = [track for track in self.tracks
+                           if track.verified == f or self.overlap(track.rect, rect) < self.minOverlap]
+
+    def locations(self, f):
+        """Return locations of tracks not verified on frame f"""
+        return [track.rect for track in self.tracks if track.verified != f]
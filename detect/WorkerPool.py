@@ -0,0 +1,84 @@
+"""
+Created on Oct 18, 2026
+
+@author: sgoldsmith
+
+Copyright (c) Steven P. Goldsmith
+
+All rights reserved.
+"""
+
+import logging, threading, sys, Queue
+
+class WorkerPool():
+    """Persistent worker threads that run batches of tasks.
+
+    If createState is passed each worker gets its own state object created once (for
+    example a detector), otherwise state is None. map() returns results in task order,
+    so results do not depend on worker scheduling. Every result of a batch is taken
+    before a failed task's exception is raised, so a failed batch leaves nothing queued.
+
+    """
+
+    def __init__(self, name, workers, createState=None):
+        self.logger = logging.getLogger("ProcessVideo")
+        self.name = name
+        self.tasks = Queue.Queue()
+        self.states = []
+        self.threads = []
+        for i in xrange(workers):
+            if createState != None:
+                self.states.append(createState())
+            else:
+                self.states.append(None)
+            thread = threading.Thread(target=self.work, args=(self.states[i],), name="%s-%d" % (name, i))
+            thread.daemon = True
+            thread.start()
+            self.threads.append(thread)
+
+    def work(self, state):
+        """Worker loop, None task stops worker"""
+        task = self.tasks.get()
+        while task != None:
+            index, function, args, results = task
+            value = None
+            error = None
+            try:
+                value = function(state, args)
+            except:
+                # Raised again by map(), so a failed task is not taken as an empty result
+                error = sys.exc_info()
+            results.put((index, value, error))
+            task = self.tasks.get()
+
+    def map(self, function, tasks):
+        """Run function(state, task) for each of tasks and return results in task order.
+
+        Tasks are queued as tasks is iterated, so workers start while a generator is
+        still making later tasks.
+
+        """
+        results = Queue.Queue()
+        count = 0
+        for args in tasks:
+            self.tasks.put((count, function, args, results))
+            count += 1
+        values = [None] * count
+        errors = [None] * count
+        for i in xrange(count):
+            index, value, error = results.get()
+            values[index] = value
+            errors[index] = error
+        for index, error in enumerate(errors):
+            if error != None:
+                self.logger.error("%s worker failed on task %d" % (self.name, index))
+                raise error[0], error[1], error[2]
+        return values
+
+    def close(self):
+        """Stop workers"""
+        for thread in self.threads:
+            self.tasks.put(None)
+        for thread in self.threads:
+            thread.join()
+        self.threads = []
@@ -0,0 +1,135 @@
+"""
+Created on Oct 18, 2026
+
+@author: sgoldsmith
+
+Copyright (c) Steven P. Goldsmith
+
+All rights reserved.
+"""
+
+import logging, numpy, cv2, FrameQueue, Stage
+
+class ClipRecorder():
+    """Records people events as video clips.
+
+    The last preRoll frames are copied into a ring buffer allocated once. When people
+    are detected a clip is started with the pre-roll frames and every frame after is
+    added until people have not been detected for postRoll frames. Encoding runs on a
+    writer thread fed by a bounded queue, so detection only waits when the writer is
+    queueSize frames behind. Frames passed to add() must not be changed afterwards.
+    Clips whose file can not be opened (codec missing) are logged and dropped.
+
+    fileName is a format with %d for the clip's first frame number. fps is the source
+    FPS. The writer repeats the previous frame for source frames that were skipped
+    (sampling, skipFrames or real-time skips), so clips play in real time.
+
+    """
+
+    def __init__(self, fileName, fourcc, fps, width, height, preRoll, postRoll, queueSize):
+        self.logger = logging.getLogger("ProcessVideo")
+        self.fileName = fileName
+        self.fourcc = fourcc
+        self.fps = fps
+        self.width = width
+        self.height = height
+        self.preRoll = preRoll
+        self.postRoll = postRoll
+        self.ring = numpy.empty((preRoll, height, width, 3), numpy.uint8)
+        # Source frame number of each ring slot, frames may be skipped between slots
+        self.ringNumbers = [0] * preRoll
+        self.ringNext = 0
+        self.ringFrames = 0
+        self.recording = False
+        self.idleFrames = 0
+        self.clipStart = 0
+        # Source frame number of last frame queued for clip
+        self.lastNumber = None
+        # Last frame written, repeated to fill skipped frames
+        self.lastFrame = None
+        # (first frame, last frame) of each clip
+        self.clips = []
+        # First frames of clips writer could not open
+        self.failedClips = set()
+        self.writer = cv2.VideoWriter()
+        self.queue = FrameQueue.FrameQueue(queueSize, False)
+        self.stage = Stage.Stage("recorder", self.write, self.queue, None)
+        self.stage.start()
+
+    def write(self, item):
+        """Open, write or close clip on writer thread"""
+        command, value = item
+        if command == "frame":
+            frame, gap = value
+            if self.writer.isOpened():
+                for i in xrange(gap - 1):
+                    self.writer.write(self.lastFrame)
+                self.writer.write(frame)
+            self.lastFrame = frame
+        elif command == "open":
+            clipStart, fileName = value
+            self.writer.open(fileName, self.fourcc, self.fps, (self.width, self.height))
+            if self.writer.isOpened():
+                self.logger.info("Writing clip to file: %s" % fileName)
+            else:
+                self.logger.error("Unable to open clip file %s, check recordCodec" % fileName)
+                self.failedClips.add(clipStart)
+        else:
+            self.writer.release()
+
+    def queueFrame(self, f, frame):
+        """Queue frame f with the number of source frames since the last one queued"""
+        if self.lastNumber == None:
+            gap = 1
+        else:
+            gap = f - self.lastNumber
+        self.lastNumber = f
+        self.queue.put(("frame", (frame, gap)))
+
+    def startClip(self, f):
+        """Open clip and queue pre-roll frames oldest first"""
+        if self.ringFrames > 0:
+            self.clipStart = self.ringNumbers[(self.ringNext - self.ringFrames) % self.preRoll]
+        else:
+            self.clipStart = f
+        self.queue.put(("open", (self.clipStart, self.fileName % self.clipStart)))
+        self.lastNumber = None
+        for i in xrange(self.ringFrames):
+            slot = (self.ringNext - self.ringFrames + i) % self.preRoll
+            # Ring slots are reused, so writer gets copies
+            self.queueFrame(self.ringNumbers[slot], self.ring[slot].copy())
+        self.ringFrames = 0
+        self.idleFrames = 0
+        self.recording = True
+
+    def stopClip(self, f):
+        """Close clip"""
+        self.queue.put(("close", None))
+        self.clips.append((self.clipStart, f))
+        self.recording = False
+
+    def add(self, f, frame, detected):
+        """Add frame, detected is True if people were found on frame"""
+        if detected:
+            self.idleFrames = 0
+            if not self.recording:
+                self.startClip(f)
+        if self.recording:
+            self.queueFrame(f, frame)
+            if not detected:
+                self.idleFrames += 1
+                if self.idleFrames >= self.postRoll:
+                    self.stopClip(f)
+        elif self.preRoll > 0:
+            self.ring[self.ringNext] = frame
+            self.ringNumbers[self.ringNext] = f
+            self.ringNext = (self.ringNext + 1) % self.preRoll
+            self.ringFrames = min(self.ringFrames + 1, self.preRoll)
+
+    def close(self, f):
+        """Close open clip at frame f and wait for writer to finish"""
+        if self.recording:
+            self.stopClip(f)
+        self.queue.put(None)
+        self.stage.join()
+        self.clips = [clip for clip in self.clips if clip[0] not in self.failedClips]
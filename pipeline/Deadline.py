@@ -0,0 +1,69 @@
+"""
+Created on Oct 18, 2026
+
+@author: sgoldsmith
+
+Copyright (c) Steven P. Goldsmith
+
+All rights reserved.
+"""
+
+class Deadline():
+    """Keeps frame processing within a latency budget.
+
+    Frame times are smoothed with an exponential moving average. When the average goes
+    over budget quality is lowered one level. When it stays under raiseFraction of the
+    budget for raiseFrames frames quality is raised one level. Level 0 is full quality
+    and what each level means is up to the caller. Independent of level, behind() tells
+    how many frames to skip to stay within maxLag of live input.
+
+    """
+
+    def __init__(self, budget, maxLag, levels, raiseFraction, raiseFrames, alpha=0.2):
+        self.budget = budget
+        self.maxLag = maxLag
+        self.raiseFraction = raiseFraction
+        self.raiseFrames = raiseFrames
+        self.alpha = alpha
+        self.level = 0
+        self.average = None
+        self.headroomFrames = 0
+        # Frames processed at each level
+        self.levelFrames = [0] * levels
+        self.lowered = 0
+        self.raised = 0
+        self.skipped = 0
+
+    def update(self, frameTime):
+        """Add frame processing time and return True if level changed"""
+        self.levelFrames[self.level] += 1
+        if self.average == None:
+            self.average = frameTime
+        else:
+            self.average += self.alpha * (frameTime - self.average)
+        if self.average > self.budget:
+            self.headroomFrames = 0
+            if self.level < len(self.levelFrames) - 1:
+                self.level += 1
+                self.lowered += 1
+                # Start over so new level is judged on its own frame times
+                self.average = None
+                return True
+        elif self.average < self.raiseFraction * self.budget:
+            self.headroomFrames += 1
+            if self.headroomFrames >= self.raiseFrames and self.level > 0:
+                self.level -= 1
+                self.raised += 1
+                self.headroomFrames = 0
+                self.average = None
+                return True
+        else:
+            self.headroomFrames = 0
+        return False
+
+    def behind(self, f, elapse, fps):
+        """Frames to skip so frame f is within maxLag seconds of live input"""
+        live = int(elapse * fps)
+        if live - f > self.maxLag * fps:
+            return live - f
+        return 0
@@ -0,0 +1,58 @@
+"""
+Created on Oct 18, 2026
+
+@author: sgoldsmith
+
+Copyright (c) Steven P. Goldsmith
+
+All rights reserved.
+"""
+
+import Queue, threading
+
+class FrameQueue():
+    """Bounded queue used to join pipeline stages.
+    
+    With blocking back pressure put waits for a free slot, so a slow stage throttles the
+    stages in front of it. With drop oldest back pressure put never waits and the oldest
+    queued item is discarded instead (better for live sources). None is used as the end
+    of stream marker and is never dropped. With drop oldest it does not wait either, so
+    a reader can always end its stream even if nothing takes from the queue any more.
+    
+    """
+    
+    def __init__(self, maxSize, dropOldest):
+        self.queue = Queue.Queue(maxSize)
+        self.dropOldest = dropOldest
+        self.lock = threading.Lock()
+        self.dropped = 0
+
+    def put(self, item):
+        """Put item on queue using configured back pressure"""
+        if self.dropOldest:
+            # Only one producer at a time can make room
+            with self.lock:
+                while True:
+                    try:
+                        self.queue.put_nowait(item)
+                        break
+                    except Queue.Full:
+                        try:
+                            self.queue.get_nowait()
+                            self.dropped += 1
+                        except Queue.Empty:
+                            pass
+        else:
+            self.queue.put(item)
+
+    def get(self):
+        """Get next item, waiting if queue is empty"""
+        return self.queue.get()
+
+    def getNowait(self):
+        """Get next item without waiting, raises Queue.Empty if queue is empty"""
+        return self.queue.get_nowait()
+
+    def size(self):
+        """Approximate number of queued items"""
+        return self.queue.qsize()
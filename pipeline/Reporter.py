@@ -0,0 +1,98 @@
+"""
+Created on Oct 18, 2026
+
+@author: sgoldsmith
+
+Copyright (c) Steven P. Goldsmith
+
+All rights reserved.
+"""
+
+import logging, threading, json, os, BaseHTTPServer
+
+class Reporter(threading.Thread):
+    """Reports Metrics snapshots every interval seconds on its own thread.
+
+    Subclasses implement report(). stop() makes one last report, so short runs are
+    reported too.
+
+    """
+
+    def __init__(self, metrics, interval):
+        threading.Thread.__init__(self, name="reporter")
+        self.daemon = True
+        self.logger = logging.getLogger("ProcessVideo")
+        self.metrics = metrics
+        self.interval = interval
+        self.stopped = threading.Event()
+
+    def report(self, snapshot):
+        """Report Metrics snapshot"""
+        pass
+
+    def run(self):
+        while not self.stopped.wait(self.interval):
+            self.report(self.metrics.snapshot())
+
+    def stop(self):
+        """Stop reporting after one last report"""
+        self.stopped.set()
+        self.join()
+        self.report(self.metrics.snapshot())
+
+class LogReporter(Reporter):
+    """Logs one line of frame rate, stage times (most total time first) and counters"""
+
+    def report(self, snapshot):
+        timers = snapshot["timers"]
+        frames = snapshot["counters"].get("frames", 0)
+        line = "Metrics: %d frames, %4.1f FPS" % (frames, frames / max(snapshot["elapse"], 0.001))
+        for name in sorted(timers, key=lambda name: timers[name]["total"], reverse=True):
+            line += ", %s %4.2f ms (p95 %4.1f)" % (name, timers[name]["mean"] * 1000.0, timers[name]["p95"] * 1000.0)
+        for name in sorted(snapshot["counters"]):
+            line += ", %s %d" % (name, snapshot["counters"][name])
+        self.logger.info(line)
+
+class JsonReporter(Reporter):
+    """Replaces JSON file with latest snapshot, so readers never see a partial file"""
+
+    def __init__(self, metrics, interval, fileName):
+        Reporter.__init__(self, metrics, interval)
+        self.fileName = fileName
+
+    def report(self, snapshot):
+        tempFileName = "%s.tmp" % self.fileName
+        with open(tempFileName, "w") as tempFile:
+            json.dump(snapshot, tempFile, indent=2, sort_keys=True)
+        os.rename(tempFileName, self.fileName)
+
+class HttpReporter(Reporter):
+    """Serves latest snapshot as JSON on localhost port, for example http://localhost:8089/"""
+
+    def __init__(self, metrics, interval, port):
+        Reporter.__init__(self, metrics, interval)
+        reporter = self
+
+        class Handler(BaseHTTPServer.BaseHTTPRequestHandler):
+            def do_GET(self):
+                body = json.dumps(reporter.metrics.snapshot(), sort_keys=True)
+                self.send_response(200)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                reporter.logger.debug("Metrics request: %s" % (format % args))
+
+        self.server = BaseHTTPServer.HTTPServer(("127.0.0.1", port), Handler)
+        self.logger.info("Serving metrics on http://127.0.0.1:%d/" % port)
+
+    def run(self):
+        # Snapshots are taken per request, so there is nothing to do every interval
+        self.server.serve_forever()
+
+    def stop(self):
+        self.server.shutdown()
+        self.join()
+        self.server.server_close()
@@ -0,0 +1,103 @@
+"""
+Created on Oct 18, 2026
+
+@author: sgoldsmith
+
+Copyright (c) Steven P. Goldsmith
+
+All rights reserved.
+"""
+
+import logging, sqlite3, time, datetime
+
+class ResultSink():
+    """Writes per frame detection results to SQLite.
+
+    Each run adds a row to runs. Each analyzed frame adds a row to frames with video time,
+    wall clock time, motion percent and people count, keyed by run and frame number and
+    indexed by time. Motion rectangles, raw HOG boxes with weights and filtered people
+    boxes go to rects in full frame coordinates. Rows are written batchFrames frames at a
+    time in one transaction, so frames with people between two times can be found
+    without decoding any video.
+
+    """
+
+    # Kinds of rects
+    MOTION = 0
+    RAW = 1
+    PEOPLE = 2
+
+    def __init__(self, fileName, batchFrames):
+        self.logger = logging.getLogger("ProcessVideo")
+        self.fileName = fileName
+        self.batchFrames = batchFrames
+        # Rows are added by the pipeline writer thread, but only one thread at a time. Batch
+        # jobs in other processes may share the file, so wait for their transactions.
+        self.connection = sqlite3.connect(fileName, timeout=30.0, check_same_thread=False)
+        self.connection.executescript("""
+            CREATE TABLE IF NOT EXISTS runs (run INTEGER PRIMARY KEY, video TEXT, mode TEXT, fps REAL,
+                                             width INTEGER, height INTEGER, started TEXT);
+            CREATE TABLE IF NOT EXISTS frames (run INTEGER, frame INTEGER, time REAL, wall REAL,
+                                               motionPercent REAL, people INTEGER, PRIMARY KEY (run, frame));
+            CREATE INDEX IF NOT EXISTS framesTime ON frames (run, time);
+            CREATE TABLE IF NOT EXISTS rects (run INTEGER, frame INTEGER, kind INTEGER,
+                                              x INTEGER, y INTEGER, w INTEGER, h INTEGER, weight REAL);
+            CREATE INDEX IF NOT EXISTS rectsFrame ON rects (run, frame);
+        """)
+        self.run = None
+        self.frameRows = []
+        self.rectRows = []
+        self.frames = 0
+
+    def start(self, video, mode, fps, width, height):
+        """Add run and return its id"""
+        cursor = self.connection.execute("INSERT INTO runs (video, mode, fps, width, height, started) VALUES (?, ?, ?, ?, ?, ?)",
+                                         (video, mode, fps, width, height, datetime.datetime.now().isoformat()))
+        self.connection.commit()
+        self.run = cursor.lastrowid
+        self.fps = fps
+        return self.run
+
+    def addRects(self, f, kind, rects, widthScale, heightScale, weights=None):
+        """Queue rects scaled to full frame coordinates"""
+        for i, (x, y, w, h) in enumerate(rects):
+            if weights == None:
+                weight = None
+            else:
+                weight = weights[i]
+            self.rectRows.append((self.run, f, kind, int(x * widthScale), int(y * heightScale), int(w * widthScale), int(h * heightScale), weight))
+
+    def add(self, result):
+        """Queue FrameResult and write batch when full"""
+        self.frameRows.append((self.run, result.f, result.f / self.fps, time.time(), result.motionPercent, len(result.foundLocations)))
+        self.addRects(result.f, self.MOTION, result.movementLocations, result.widthScale, result.heightScale)
+        if result.peopleInSource:
+            widthScale, heightScale = result.widthScale, result.heightScale
+        else:
+            widthScale, heightScale = 1.0, 1.0
+        self.addRects(result.f, self.RAW, result.rawLocations, widthScale, heightScale, result.rawWeights)
+        self.addRects(result.f, self.PEOPLE, result.foundLocations, widthScale, heightScale)
+        self.frames += 1
+        if len(self.frameRows) >= self.batchFrames:
+            self.flush()
+
+    def flush(self):
+        """Write queued rows in one transaction"""
+        with self.connection:
+            self.connection.executemany("INSERT OR REPLACE INTO frames VALUES (?, ?, ?, ?, ?, ?)", self.frameRows)
+            self.connection.executemany("INSERT INTO rects VALUES (?, ?, ?, ?, ?, ?, ?, ?)", self.rectRows)
+        self.frameRows = []
+        self.rectRows = []
+
+    def peopleFrames(self, startTime, stopTime, run=None):
+        """Return (frame, time, people) of frames with people between two video times (last run if None)"""
+        if run == None:
+            run = self.run
+        return self.connection.execute("SELECT frame, time, people FROM frames WHERE run = ? AND time BETWEEN ? AND ? AND people > 0 ORDER BY time",
+                                       (run, startTime, stopTime)).fetchall()
+
+    def close(self):
+        """Write remaining rows and close file"""
+        self.flush()
+        self.logger.info("Wrote results for %d frames to file: %s" % (self.frames, self.fileName))
+        self.connection.close()
@@ -0,0 +1,124 @@
+"""
+Created on Oct 18, 2026
+
+@author: sgoldsmith
+
+Copyright (c) Steven P. Goldsmith
+
+All rights reserved.
+"""
+
+import logging, threading, traceback, Queue
+
+class Scheduler():
+    """Shares a fixed pool of detection workers across streams.
+
+    Each worker takes the next frame from the ready stream with the lowest virtual time.
+    Serving a frame advances a stream's virtual time by 1 / priority, so a stream with
+    priority 2 gets twice the frames of one with priority 1 when both are behind, and
+    ties go round-robin. A stream is only worked on by one worker at a time, which keeps
+    its frames in order. A stream that ran out of frames starts again at the current
+    virtual time, so it can not save up turns and starve the others.
+
+    Workers wait for frames at most waitSeconds before checking streams again, so a
+    stream whose reader died without queueing its end is finished as failed instead of
+    hanging the scheduler.
+
+    """
+
+    waitSeconds = 1.0
+
+    def __init__(self, streams, workers):
+        self.logger = logging.getLogger("ProcessVideo")
+        self.streams = streams
+        self.workers = workers
+        self.condition = threading.Condition()
+        self.virtualTime = 0.0
+        self.turn = 0
+        for stream in streams:
+            stream.notify = self.notify
+
+    def notify(self):
+        """Wake workers waiting for frames"""
+        with self.condition:
+            self.condition.notify_all()
+
+    def next(self):
+        """Pick stream to serve or None if no stream is ready (condition must be held)"""
+        count = len(self.streams)
+        best = None
+        for i in xrange(count):
+            index = (self.turn + i) % count
+            stream = self.streams[index]
+            if stream.busy or stream.finished:
+                continue
+            if stream.queue.size() == 0:
+                stream.idle = True
+                continue
+            # Idle streams can not save up turns
+            if stream.idle:
+                stream.virtualTime = max(stream.virtualTime, self.virtualTime)
+                stream.idle = False
+            if best == None or stream.virtualTime < best.virtualTime:
+                best, bestIndex = stream, index
+        if best != None:
+            self.turn = bestIndex + 1
+            self.virtualTime = max(self.virtualTime, best.virtualTime)
+            best.virtualTime += 1.0 / best.priority
+        return best
+
+    def reap(self):
+        """Finish streams whose reader ended without queueing its end (condition must be held)"""
+        for stream in self.streams:
+            if not stream.finished and not stream.busy and stream.ident != None and not stream.is_alive() and stream.queue.size() == 0:
+                self.logger.error("Stream %s reader ended without finishing" % stream.name)
+                stream.failed = True
+                stream.finished = True
+
+    def work(self):
+        """Worker loop, ends when every stream is finished"""
+        while True:
+            with self.condition:
+                stream = self.next()
+                while stream == None:
+                    if all(stream.finished for stream in self.streams):
+                        return
+                    self.condition.wait(self.waitSeconds)
+                    self.reap()
+                    stream = self.next()
+                try:
+                    item = stream.queue.getNowait()
+                except Queue.Empty:
+                    continue
+                if item == None:
+                    stream.finished = True
+                    self.condition.notify_all()
+                    continue
+                stream.busy = True
+            try:
+                stream.process(item)
+            except:
+                self.logger.error("Stream %s failed:\n%s" % (stream.name, traceback.format_exc()))
+                stream.failed = True
+                stream.stopped = True
+                stream.finished = True
+            with self.condition:
+                stream.busy = False
+                self.condition.notify_all()
+
+    def run(self):
+        """Start streams and workers and wait for every stream to finish"""
+        self.logger.info("Scheduling %d streams on %d workers" % (len(self.streams), self.workers))
+        threads = [threading.Thread(target=self.work, name="scheduler-%d" % i) for i in xrange(self.workers)]
+        for thread in threads:
+            thread.daemon = True
+            thread.start()
+        for stream in self.streams:
+            stream.start()
+        for thread in threads:
+            thread.join()
+        for stream in self.streams:
+            stream.join()
+        for stream in self.streams:
+            if stream.failed:
+                self.logger.error("Stream %s failed after %d of %d frames analyzed" % (stream.name, stream.analyzed, stream.frames))
@@ -0,0 +1,66 @@
+"""
+Created on Oct 18, 2026
+
+@author: sgoldsmith
+
+Copyright (c) Steven P. Goldsmith
+
+All rights reserved.
+"""
+
+import logging, threading, time, traceback
+
+class Stage(threading.Thread):
+    """Pipeline stage running on its own thread.
+    
+    If inQueue is None function is a generator that produces items (source stage).
+    Otherwise function is called for each item taken from inQueue. Non None results
+    are put on outQueue. None is passed downstream when the stage finishes, so
+    stages shut down in order.
+    
+    """
+    
+    def __init__(self, name, function, inQueue, outQueue):
+        threading.Thread.__init__(self, name=name)
+        self.daemon = True
+        self.logger = logging.getLogger("ProcessVideo")
+        self.function = function
+        self.inQueue = inQueue
+        self.outQueue = outQueue
+        self.items = 0
+        self.busyTime = 0.0
+        self.failed = False
+
+    def emit(self, result):
+        """Pass result to next stage"""
+        if result != None and self.outQueue != None:
+            self.outQueue.put(result)
+        
+    def run(self):
+        try:
+            if self.inQueue == None:
+                start = time.time()
+                for result in self.function():
+                    self.busyTime += time.time() - start
+                    self.items += 1
+                    self.emit(result)
+                    start = time.time()
+            else:
+                item = self.inQueue.get()
+                while item != None:
+                    start = time.time()
+                    result = self.function(item)
+                    self.busyTime += time.time() - start
+                    self.items += 1
+                    self.emit(result)
+                    item = self.inQueue.get()
+        except:
+            self.failed = True
+            self.logger.error("Stage %s failed:\n%s" % (self.name, traceback.format_exc()))
+            # Drain input so upstream stages do not block forever
+            if self.inQueue != None:
+                while self.inQueue.get() != None:
+                    pass
+        finally:
+            if self.outQueue != None:
+                self.outQueue.put(None)
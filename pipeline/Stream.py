@@ -0,0 +1,123 @@
+"""
+Created on Oct 18, 2026
+
+@author: sgoldsmith
+
+Copyright (c) Steven P. Goldsmith
+
+All rights reserved.
+"""
+
+import logging, threading, time, traceback, os, glob, cv2, FrameQueue
+
+class Stream(threading.Thread):
+    """Frame source for multi-stream processing.
+
+    A reader thread decodes a video file, named pipe or directory of frame images into a
+    bounded drop oldest queue, so a stream that falls behind loses its oldest frames
+    instead of stalling the reader. With replay frames are read at the source's native
+    FPS to simulate a live camera. Each stream has its own detection session, so motion,
+    event and tracking state is never shared. Frames are taken off the queue and run
+    through process() by Scheduler workers.
+
+    """
+
+    # Image files read from a directory of frames
+    frameExtensions = ("*.jpg", "*.jpeg", "*.png", "*.bmp")
+
+    def __init__(self, name, source, session, mode, queueSize, priority, replay, frameFps):
+        threading.Thread.__init__(self, name="stream-%s" % name)
+        self.daemon = True
+        self.logger = logging.getLogger("ProcessVideo")
+        self.source = source
+        self.session = session
+        self.useResize, self.useRoi, self.useCascade = mode
+        self.queue = FrameQueue.FrameQueue(queueSize, True)
+        self.priority = priority
+        self.replay = replay
+        self.fps = frameFps
+        # Called after each frame is queued (set by Scheduler)
+        self.notify = None
+        # Scheduler state
+        self.busy = False
+        self.finished = False
+        self.stopped = False
+        self.idle = True
+        self.virtualTime = 0.0
+        # Statistics
+        self.frames = 0
+        self.analyzed = 0
+        self.imagesDetected = 0
+        self.latency = 0.0
+        self.failed = False
+        self.started = False
+
+    def readFrames(self):
+        """Generate frames from directory of images or anything VideoCapture opens"""
+        if os.path.isdir(self.source):
+            fileNames = []
+            for extension in self.frameExtensions:
+                fileNames.extend(glob.glob(os.path.join(self.source, extension)))
+            for fileName in sorted(fileNames):
+                frame = cv2.imread(fileName)
+                if frame != None:
+                    yield frame
+        else:
+            capture = cv2.VideoCapture(self.source)
+            # Missing or unreadable source fails the stream instead of ending it with no frames
+            if not capture.isOpened():
+                raise IOError("Unable to open video source %s" % self.source)
+            fps = capture.get(cv2.CAP_PROP_FPS)
+            # Pipes and some containers do not report FPS
+            if fps > 0.0:
+                self.fps = fps
+            s, frame = capture.read()
+            while s:
+                yield frame
+                s, frame = capture.read()
+            capture.release()
+
+    def run(self):
+        try:
+            start = time.time()
+            for frame in self.readFrames():
+                if self.stopped:
+                    break
+                # Live cameras do not deliver frames faster than their FPS
+                if self.replay:
+                    delay = start + self.frames / self.fps - time.time()
+                    if delay > 0.0:
+                        time.sleep(delay)
+                self.queue.put((self.frames, frame, time.time()))
+                self.frames += 1
+                self.notify()
+        except:
+            self.logger.error("Stream %s failed:\n%s" % (self.name, traceback.format_exc()))
+            self.failed = True
+        finally:
+            self.queue.put(None)
+            self.notify()
+
+    def process(self, item):
+        """Do detection on one queued frame"""
+        f, frame, timestamp = item
+        if not self.started:
+            imgHeight, imgWidth = frame.shape[:2]
+            self.session.start(imgWidth, imgHeight, self.useResize, self.useRoi, self.useCascade, self.fps)
+            self.started = True
+        result = self.session.process(frame, f)
+        self.analyzed += 1
+        if len(result.foundLocations) > 0:
+            self.imagesDetected += 1
+        # Time from decode to detection done
+        self.latency += time.time() - timestamp
+        return result
+
+    def stats(self):
+        """Return dict of stream statistics"""
+        if self.analyzed > 0:
+            latency = self.latency / self.analyzed
+        else:
+            latency = 0.0
+        return {"source": self.source, "priority": self.priority, "frames": self.frames, "analyzed": self.analyzed,
+                "dropped": self.queue.dropped, "imagesDetected": self.imagesDetected, "latency": latency, "failed": self.failed}
@@ -0,0 +1,30 @@
+"""
+Created on Oct 18, 2026
+
+@author: sgoldsmith
+
+Copyright (c) Steven P. Goldsmith
+
+All rights reserved.
+"""
+
+import os, sys, unittest, numpy
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "detect"))
+
+import People
+
+class TestPeople(unittest.TestCase):
+
+    def testMarkScale(self):
+        # 640 / 349 does not divide evenly
+        people = People.People(349, 240, 640, 480, 0.0, (8, 8), (32, 32), 1.05, 2.0, False,
+                               True, (0, 255, 0), (255, 0, 0), (255, 255, 255), 1, None)
+        source = numpy.zeros((240, 349, 3), numpy.uint8)
+        target = numpy.zeros((480, 640, 3), numpy.uint8)
+        people.markLocations(source, target, [(100, 50, 40, 80)], [])
+        ys, xs = numpy.nonzero(target[:, :, 1])
+        self.assertEqual((xs.min(), ys.min(), xs.max(), ys.max()), (int(100 * 640 / 349.0), 100, int(140 * 640 / 349.0), 260))
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,72 @@
+"""
+Created on Oct 18, 2026
+
+@author: sgoldsmith
+
+Copyright (c) Steven P. Goldsmith
+
+All rights reserved.
+
+Check that pooled ROI detection matches serial detection when ROIs overlap.
+"""
+
+import os, sys, unittest, numpy, cv2
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "detect"))
+
+import People, PeoplePool
+
+resources = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "resources")
+
+def readFrame(fileName, f, width, height):
+    """Frame f of video resized to width x height"""
+    videoCapture = cv2.VideoCapture(os.path.join(resources, fileName))
+    for i in xrange(f + 1):
+        ret, image = videoCapture.read()
+    videoCapture.release()
+    return cv2.resize(image, (width, height))
+
+def createPeople():
+    """People detector with test.ini settings that marks objects"""
+    return People.People(320, 240, 320, 240, 0.0, (8, 8), (32, 32), 1.05, 2.0, False,
+                         True, (0, 255, 0), (255, 0, 0), (255, 255, 255), 2, None)
+
+class TestPeoplePool(unittest.TestCase):
+
+    # Column ROIs that overlap by 60 pixels
+    rects = [(0, 0, 160, 240), (100, 0, 160, 240), (200, 0, 120, 240)]
+
+    def rois(self, image):
+        return [(x, y, image[y:y + h, x:x + w], image[y:y + h, x:x + w]) for x, y, w, h in self.rects]
+
+    def serial(self, image):
+        """Detect every ROI of an unmarked frame, then mark"""
+        people = createPeople()
+        foundLocations = []
+        results = []
+        for x, y, sourceRoi, targetRoi in self.rois(image):
+            roiLocations, roiLocationsFiltered = people.find(sourceRoi)
+            results.append((roiLocations, roiLocationsFiltered))
+            foundLocations.extend([(fx + x, fy + y, fw, fh) for fx, fy, fw, fh in roiLocationsFiltered])
+        for (x, y, sourceRoi, targetRoi), (roiLocations, roiLocationsFiltered) in zip(self.rois(image), results):
+            if len(roiLocations) > 0:
+                people.markLocations(sourceRoi, targetRoi, roiLocations, roiLocationsFiltered)
+        return foundLocations
+
+    def testOverlappingRois(self):
+        frame = readFrame("walking.avi", 30, 320, 240)
+        expectedImage = frame.copy()
+        expected = self.serial(expectedImage)
+        self.assertTrue(len(expected) > 0)
+        pool = PeoplePool.PeoplePool(3, createPeople)
+        try:
+            for trial in xrange(5):
+                image = frame.copy()
+                self.assertEqual([tuple(int(v) for v in rect) for rect in pool.detect(self.rois(image))],
+                                 [tuple(int(v) for v in rect) for rect in expected])
+                numpy.testing.assert_array_equal(image, expectedImage)
+        finally:
+            pool.close()
+
+if __name__ == "__main__":
+    unittest.main()
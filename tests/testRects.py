@@ -0,0 +1,123 @@
+"""
+Created on Oct 18, 2026
+
+@author: sgoldsmith
+
+Copyright (c) Steven P. Goldsmith
+
+All rights reserved.
+
+Compare batched rectangle tests with the per rectangle loops they replaced.
+"""
+
+import os, sys, unittest, numpy
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "detect"))
+
+import DetectBase, Rects
+
+def insideLoop(r, q):
+    """Old DetectBase.inside"""
+    rx, ry, rw, rh = r
+    qx, qy, qw, qh = q
+    return rx > qx and ry > qy and rx + rw < qx + qw and ry + rh < qy + qh
+
+def filterLoop(locations, ignoreAreas):
+    """Old People.detect nested and ignore area filter"""
+    filtered = []
+    for ri, r in enumerate(locations):
+        for qi, q in enumerate(locations):
+            if ri != qi and insideLoop(r, q):
+                break
+        else:
+            if ignoreAreas == None or not any(insideLoop(r, area) for area in ignoreAreas):
+                filtered.append(r)
+    return filtered
+
+def iouLoop(r, q):
+    """Intersection over union of one pair"""
+    rx, ry, rw, rh = r
+    qx, qy, qw, qh = q
+    w = max(min(rx + rw, qx + qw) - max(rx, qx), 0)
+    h = max(min(ry + rh, qy + qh) - max(ry, qy), 0)
+    union = rw * rh + qw * qh - w * h
+    if union <= 0:
+        return 0.0
+    return float(w * h) / union
+
+def nmsLoop(rects, weights, threshold):
+    """Greedy non maximum suppression comparing one pair at a time"""
+    order = sorted(xrange(len(rects)), key=lambda i: -weights[i])
+    keep = []
+    for i in order:
+        for k in keep:
+            if iouLoop(rects[i], rects[k]) > threshold:
+                break
+        else:
+            keep.append(i)
+    return keep
+
+class Locations(DetectBase.DetectBase):
+    """Detector with only ignore areas, for filterLocations"""
+
+    def __init__(self, ignoreAreas):
+        self.ignoreAreas = ignoreAreas
+        if ignoreAreas != None:
+            self.ignoreAreaRects = Rects.IgnoreAreas(ignoreAreas)
+
+    def detect(self, source, target):
+        return []
+
+class TestRects(unittest.TestCase):
+
+    def setUp(self):
+        self.random = numpy.random.RandomState(7)
+
+    def randomRects(self, count, size=200):
+        """Rectangles on a small grid so nested, equal and touching ones are common"""
+        xy = self.random.randint(0, size, (count, 2))
+        wh = self.random.randint(0, size // 2, (count, 2))
+        return [tuple(int(v) for v in rect) for rect in numpy.hstack((xy, wh))]
+
+    def testInside(self):
+        for trial in xrange(50):
+            r = self.randomRects(self.random.randint(0, 20))
+            q = self.randomRects(self.random.randint(0, 20))
+            expected = [[insideLoop(a, b) for b in q] for a in r]
+            numpy.testing.assert_array_equal(Rects.inside(Rects.toArray(r), Rects.toArray(q)).reshape(len(r), len(q)), numpy.array(expected, dtype=bool).reshape(len(r), len(q)))
+
+    def testIgnoreAreas(self):
+        for trial in xrange(50):
+            rects = self.randomRects(self.random.randint(0, 30))
+            areas = self.randomRects(self.random.randint(0, 5), 100)
+            expected = [any(insideLoop(r, area) for area in areas) for r in rects]
+            self.assertEqual(list(Rects.IgnoreAreas(areas).inside(Rects.toArray(rects))), expected)
+
+    def testFilterLocations(self):
+        for trial in xrange(100):
+            locations = self.randomRects(self.random.randint(0, 30))
+            if trial % 2 == 0:
+                ignoreAreas = None
+            else:
+                ignoreAreas = self.randomRects(3, 100)
+            filtered = Locations(ignoreAreas).filterLocations(locations, True)
+            self.assertEqual(filtered, filterLoop(locations, ignoreAreas))
+
+    def testIou(self):
+        for trial in xrange(50):
+            r = self.randomRects(self.random.randint(1, 20))
+            q = self.randomRects(self.random.randint(1, 20))
+            expected = [[iouLoop(a, b) for b in q] for a in r]
+            numpy.testing.assert_allclose(Rects.iou(Rects.toArray(r), Rects.toArray(q)), expected)
+
+    def testNms(self):
+        for trial in xrange(100):
+            rects = self.randomRects(self.random.randint(0, 40))
+            # Ties keep the first rectangle, like a stable sort
+            weights = list(self.random.randint(0, 10, len(rects)) / 10.0)
+            threshold = self.random.choice([0.0, 0.3, 0.5, 0.7])
+            keep = Rects.nms(Rects.toArray(rects), weights, threshold)
+            self.assertEqual(list(keep), nmsLoop(rects, weights, threshold))
+
+if __name__ == "__main__":
+    unittest.main()
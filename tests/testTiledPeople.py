@@ -0,0 +1,74 @@
+"""
+Created on Oct 18, 2026
+
+@author: sgoldsmith
+
+Copyright (c) Steven P. Goldsmith
+
+All rights reserved.
+
+Check that tiled HOG gives the same people as HOGDescriptor.detectMultiScale.
+"""
+
+import os, sys, logging, unittest, numpy, cv2
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "detect"))
+
+import People, TiledPeople
+
+# Failed tile is logged before it is raised
+logging.getLogger("ProcessVideo").addHandler(logging.NullHandler())
+
+resources = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "resources")
+
+def readFrame(fileName, f):
+    """Full size frame f of video"""
+    videoCapture = cv2.VideoCapture(os.path.join(resources, fileName))
+    for i in xrange(f + 1):
+        ret, image = videoCapture.read()
+    videoCapture.release()
+    return image
+
+def sortedHits(locations, weights):
+    """Hits as sorted list of (rect, weight)"""
+    return sorted(zip([tuple(rect) for rect in numpy.asarray(locations).reshape(-1, 4).tolist()], numpy.ravel(weights).tolist()))
+
+class TestTiledPeople(unittest.TestCase):
+
+    def compare(self, image, workers, hitThreshold, winStride, padding, scale, finalThreshold):
+        height, width = image.shape[:2]
+        args = (width, height, width, height, hitThreshold, winStride, padding, scale, finalThreshold, False,
+                False, (0, 255, 0), (255, 0, 0), (255, 255, 255), 1, None)
+        people = People.People(*args)
+        tiledPeople = TiledPeople.TiledPeople(workers, *args)
+        try:
+            expected = sortedHits(*people.hog.detectMultiScale(image, hitThreshold=hitThreshold, winStride=winStride, padding=padding,
+                                                               scale=scale, finalThreshold=finalThreshold))
+            hits = sortedHits(*tiledPeople.multiScale(image))
+        finally:
+            tiledPeople.close()
+        self.assertTrue(len(expected) > 0)
+        self.assertEqual([rect for rect, weight in hits], [rect for rect, weight in expected])
+        numpy.testing.assert_allclose([weight for rect, weight in hits], [weight for rect, weight in expected], rtol=0, atol=1e-9)
+
+    def testDefaults(self):
+        self.compare(readFrame("walking.avi", 30), 4, 0.0, (8, 8), (32, 32), 1.05, 2.0)
+
+    def testOtherSettings(self):
+        self.compare(readFrame("two-guys.avi", 20), 3, -0.3, (4, 4), (16, 8), 1.1, 1.0)
+
+    def testTileFailure(self):
+        image = readFrame("walking.avi", 30)
+        height, width = image.shape[:2]
+        tiledPeople = TiledPeople.TiledPeople(2, width, height, width, height, 0.0, (8, 8), (32, 32), 1.05, 2.0, False,
+                                              False, (0, 255, 0), (255, 0, 0), (255, 255, 255), 1, None)
+        try:
+            # HOG does not take float images, so every tile fails
+            self.assertRaises(cv2.error, tiledPeople.multiScale, image.astype(numpy.float64))
+            # Nothing is left queued, so the next frame still works
+            self.assertEqual(len(tiledPeople.multiScale(image)[0]) > 0, True)
+        finally:
+            tiledPeople.close()
+
+if __name__ == "__main__":
+    unittest.main()
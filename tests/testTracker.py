@@ -0,0 +1,40 @@
+"""
+Created on Oct 18, 2026
+
+@author: sgoldsmith
+
+Copyright (c) Steven P. Goldsmith
+
+All rights reserved.
+"""
+
+import os, sys, unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "detect"))
+
+import Tracker
+
+class TestTracker(unittest.TestCase):
+
+    def setUp(self):
+        self.tracker = Tracker.Tracker(10, 0.5, 2)
+        self.tracker.update(0, [(100, 100, 20, 40)], [(90, 90, 40, 60)])
+        self.tracker.split(0, [(90, 90, 40, 60)])
+
+    def testMovesOncePerFrame(self):
+        # Both motion locations cover the track, the bigger overlap moves it
+        self.tracker.split(1, [(100, 90, 40, 60), (110, 95, 60, 60)])
+        self.assertEqual(self.tracker.tracks[0].rect, (110, 100, 20, 40))
+        self.assertEqual(self.tracker.tracks[0].motionRect, (100, 90, 40, 60))
+
+    def testUncheckedLocationKeepsTrack(self):
+        # Nothing was scanned by HOG, so the track is not a confirmed miss
+        self.assertEqual(self.tracker.split(1, [(90, 90, 40, 60)]), [])
+        self.tracker.update(1, [], [])
+        self.assertEqual(len(self.tracker.tracks), 1)
+        # Scanned with no person found drops it
+        self.tracker.update(1, [], [(90, 90, 40, 60)])
+        self.assertEqual(len(self.tracker.tracks), 0)
+
+if __name__ == "__main__":
+    unittest.main()